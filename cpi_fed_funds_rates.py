@@ -2,26 +2,41 @@
 import pandas as pd
 import numpy as np
 import matplotlib.ticker as mtick
-import pandas_datareader.data as web
 import pandas.tseries.offsets as BDay
 from dateutil.relativedelta import relativedelta
 from datetime import date
 
-from pricing import curves
+from pricing import conventions, curves
+from pricing.alignment import Aggregation, FrequencyAligner
+from pricing.replay import get_series_provider
+from pricing.series_providers import Frequency
 
 # %%
 report_start = date.fromisoformat("1969-01-01")
 report_end = date.today()
 
+fred = get_series_provider()
+
+# All series of the report are fetched at once so that they are downloaded concurrently
+fred.refresh(
+    ["CPIAUCSL", "FEDFUNDS", "GS3M", "FII10", "GDPC1"]
+    + ["GS1", "GS2", "GS3", "GS5", "GS7", "GS10", "GS20", "GS30"]
+    + ["DGS1MO", "DGS3MO", "DGS6MO"]
+    + ["T5YIEM", "T7YIEM", "T10YIEM", "T20YIEM", "T30YIEM"]
+    + ["EXPINF" + str(i) + "YR" for i in range(1, 31)],
+    report_start,
+    report_end,
+)
+
 
 # %%
-fred_cpi_ffr = web.get_data_fred(
+fred_cpi_ffr = fred.get_series(
     ["CPIAUCSL", "FEDFUNDS", "GS10", "GS3M", "FII10"],
     start=report_start,
     end=report_end,
 )
 
-real_gdp = web.get_data_fred("GDPC1", start=report_start, end=report_end)
+real_gdp = fred.get_series("GDPC1", start=report_start, end=report_end)
 
 # %%
 
@@ -68,7 +83,7 @@ _ = ax.set_xticklabels(list(map("{:%Y-%m}".format, fred_cpi_ffr.index[::24])))
 
 # %%
 from_date = date(2020, 1, 1)
-cpi = web.get_data_fred("CPIAUCSL", start=report_start, end=report_end)
+cpi = fred.get_series("CPIAUCSL", start=report_start, end=report_end)
 cpi_monthly = (
     cpi.pct_change(fill_method="bfill")
     .loc[from_date:, "CPIAUCSL"]
@@ -254,7 +269,7 @@ print(
 report_start = date.fromisoformat("2012-01-01")
 
 # Treasury yield curve
-data = web.get_data_fred(
+data = fred.get_series(
     ["FEDFUNDS", "GS1", "GS2", "GS3", "GS5", "GS7", "GS10", "GS20", "GS30"],
     report_start,
     report_end,
@@ -264,8 +279,12 @@ data.dropna(inplace=True)
 # The following data series are only provided with daily frequences, hence we need to downsample them
 # by taking their mean value over a given month and rounding to two decimal points (that's how values
 # in series with monthly frequencies are calculated)
-data2 = web.get_data_fred(["DGS1MO", "DGS3MO", "DGS6MO"], report_start, report_end)
-data2 = data2.resample("MS").mean().round(2)
+data2 = FrequencyAligner("M")
+for series_id in ["DGS1MO", "DGS3MO", "DGS6MO"]:
+    data2.add_source(series_id, Frequency.DAILY, Aggregation.MEAN, decimals=2)
+data2 = data2.update(
+    fred.get_series(["DGS1MO", "DGS3MO", "DGS6MO"], report_start, report_end)
+).get_frame()
 
 data = pd.concat([data, data2], axis=1).dropna()
 
@@ -296,21 +315,21 @@ data.rename(
 data /= 100.0
 
 # Converting the Fed Funds Rate to actual/actual
-leap_year_cond = data.FEDFUNDS.index.year % 4 == 0 & (
-    (data.FEDFUNDS.index.year % 100 != 0) | (data.FEDFUNDS.index.year % 400 == 0)
+data["FEDFUNDS"] = conventions.convert_day_count(
+    data.FEDFUNDS, conventions.DayCount.ACT_360, conventions.DayCount.ACT_ACT
 )
-data.FEDFUNDS[leap_year_cond] *= 366.0 / 360
-data.FEDFUNDS[np.invert(leap_year_cond)] *= 365.0 / 360
 
 # Converting all CMT Yields to APY
-data.iloc[:, 1:] = (data.iloc[:, 1:] / 2 + 1) ** 2 - 1
+data.iloc[:, 1:] = conventions.convert_compounding(
+    data.iloc[:, 1:], conventions.SEMIANNUAL, conventions.ANNUAL
+)
 
 data
 
 # %%
 
 # Inflation expectations as given by breakeven inflation rates
-data_infl_brk_evn = web.get_data_fred(
+data_infl_brk_evn = fred.get_series(
     ["T5YIEM", "T7YIEM", "T10YIEM", "T20YIEM", "T30YIEM"], report_start, report_end
 )
 data_infl_brk_evn.dropna(inplace=True)
@@ -319,7 +338,7 @@ cpi = fred_cpi_ffr[["Annual seasonaly adjusted CPI"]].loc["2012":]
 
 # Expected inflation as calculated by The Federal Reserve Bank of Cleveland based on Inflation swap data,
 # Treasury Yields, current CPI, Blue Chip forecast of CPI.
-data_infl = web.get_data_fred(
+data_infl = fred.get_series(
     ["EXPINF" + str(i) + "YR" for i in range(1, 31)], report_start, report_end
 ).shift(-1)
 
@@ -450,3 +469,9 @@ curve_infl_brk_evn_5_years_ago = curves.YieldCurve(
 )
 
 # %%
+
+# Yield curves for every month of the report fitted in one batch, e.g. to chart the history of 5.5y yields
+curve_panel = curves.YieldCurvePanel(data, offsets)
+curve_panel.get_yields_for_maturity(5.5)
+
+# %%
@@ -2,19 +2,22 @@
 import pandas as pd
 import numpy as np
 import matplotlib.ticker as mtick
-import pandas_datareader.data as web
 import datetime as date
 from datetime import date
 from dateutil.relativedelta import relativedelta
 from pandas.tseries.offsets import MonthBegin
 
+from pricing.replay import get_series_provider
+
 # %%
 report_start = date.fromisoformat("1959-01-01")
 report_end = date.today()
 
+fred = get_series_provider()
+
 
 # %%
-cpis = web.get_data_fred(
+cpis = fred.get_series(
     [
         "CPIAUCSL",
         "CPILFESL",
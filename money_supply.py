@@ -2,15 +2,28 @@
 import pandas as pd
 import numpy as np
 import matplotlib.ticker as mtick
-import pandas_datareader.data as web
 from datetime import date
 
+from pricing.alignment import FrequencyAligner
+from pricing.replay import get_series_provider
+from pricing.series_providers import Frequency
+
 # %%
 report_start = date.fromisoformat("2008-10-01")
 report_end = date.today()
 
+fred = get_series_provider()
+
+# All series of the report are fetched at once so that they are downloaded concurrently
+fred.refresh(
+    ["CPIAUCSL", "MBCURRCIR", "M1NS", "M2NS", "BOGMBBM", "GS1M", "IORR", "IORB"]
+    + ["TERMT", "WLODLL", "DGS1MO", "GDP"],
+    report_start,
+    report_end,
+)
+
 # %%
-nom_2_real_conv_factors = web.get_data_fred(
+nom_2_real_conv_factors = fred.get_series(
     "CPIAUCSL", start=report_start, end=report_end
 )
 nom_2_real_conv_factors["conv_factor"] = (
@@ -22,7 +35,7 @@ nom_2_real_conv_factors = nom_2_real_conv_factors.conv_factor
 # %%
 report_start = date(2020, month=5, day=1)
 # %%
-m2_components = web.get_data_fred(
+m2_components = fred.get_series(
     ["MBCURRCIR", "M1NS", "M2NS"], start=report_start, end=report_end
 )
 
@@ -275,7 +288,7 @@ for c in ax.containers:
 # %%
 
 report_start = date(2008, month=10, day=1)
-mbase_reserves = web.get_data_fred(
+mbase_reserves = fred.get_series(
     ["BOGMBBM", "GS1M"], start=report_start, end=report_end
 )
 
@@ -286,57 +299,61 @@ mbase_reserves.BOGMBBM /= 1000.0
 mbase_reserves.GS1M /= 100.0
 
 iorr = (
-    web.get_data_fred("IORR", start=report_start, end=report_end).resample("MS").mean()
+    fred.get_series("IORR", start=report_start, end=report_end).resample("MS").mean()
     / 100.0
 )
 iorb = (
-    web.get_data_fred("IORB", start=report_start, end=report_end).resample("MS").mean()
+    fred.get_series("IORB", start=report_start, end=report_end).resample("MS").mean()
     / 100.0
 )
 iorb = pd.concat([iorr.IORR, iorb.IORB])
 
 # %%
 
-# Approximate the latest value of Reservvev Balances
-reserve_balances = web.get_data_fred(
-    ["TERMT", "WLODLL"], start=report_start, end=report_end
-).asfreq("W-Wed")
-reserve_balances = reserve_balances.sum(axis=1).resample("MS").mean() / 1000.0
-reserve_balances.rename("BOGMBBM", inplace=True)
-idx = reserve_balances.index.difference(mbase_reserves.BOGMBBM.dropna().index)
+# Approximate the latest value of Reservvev Balances by the weekly sums of term deposits and other deposits
+# held by depository institutions, weeks missing either of them count it as zero
+weekly_reserves = (
+    fred.get_series(["TERMT", "WLODLL"], start=report_start, end=report_end)
+    .asfreq("W-WED")
+    .sum(axis=1)
+    .rename("BOGMBBM")
+)
+
+# Weekly reserve balances and daily 1-month treasury yields are averaged over months
+# and quarterly GDP is forward filled
+monthly = (
+    FrequencyAligner("M")
+    .add_source("BOGMBBM", Frequency.WEEKLY)
+    .add_source("DGS1MO", Frequency.DAILY)
+    .add_source("GDP", Frequency.QUARTERLY)
+    .update(
+        pd.concat(
+            [
+                weekly_reserves,
+                fred.get_series(["DGS1MO", "GDP"], start=report_start, end=report_end),
+            ],
+            axis=1,
+            sort=True,
+        )
+    )
+    .get_frame()
+)
+reserve_balances = monthly.BOGMBBM / 1000.0
 
 # Approximate the latest value of 1-month treasury securities
-latest_1m_tr_yield = (
-    web.get_data_fred("DGS1MO", start=report_start, end=report_end).DGS1MO / 100.0
-)
-latest_1m_tr_yield = latest_1m_tr_yield.resample("MS").mean()
+latest_1m_tr_yield = monthly.DGS1MO / 100.0
 latest_1m_tr_yield.rename("GS1M", inplace=True)
 
-# First update the missing values in mbase_reservves dataframe
-mbase_reserves.update(
-    pd.concat([reserve_balances[idx], latest_1m_tr_yield[idx]], axis=1)
-)
-
-# Now append the missing row if any
-idx = reserve_balances.index.difference(mbase_reserves.index)
+# Fill in the months missing reserve balances with the approximations, appending the missing rows if any
+idx = reserve_balances.dropna().index.difference(mbase_reserves.BOGMBBM.dropna().index)
 mbase_reserves = pd.concat(
-    [
-        mbase_reserves,
-        pd.concat([reserve_balances[idx], latest_1m_tr_yield[idx]], axis=1),
-    ]
-)
+    [reserve_balances[idx], latest_1m_tr_yield[idx]], axis=1
+).combine_first(mbase_reserves)
 
 # %%
 
 # Upsampling to monthly frequencies to match the frequency of S&P 500 metrics
-gdp = (
-    web.get_data_fred("GDP", start=report_start, end=report_end)
-    .GDP.resample("MS")
-    .ffill()
-)
-missing_months = mbase_reserves.index.difference(gdp.index)
-gdp = pd.concat([gdp, pd.Series(np.nan, index=missing_months)]).sort_index()
-
+gdp = monthly.GDP
 
 reserves_to_gdp = mbase_reserves.BOGMBBM / gdp
 
@@ -474,7 +491,7 @@ print(
 )
 # %%
 
-m2_total = web.get_data_fred("M2NS", start=irt_reserves.index[0]).M2NS
+m2_total = fred.get_series("M2NS", start=irt_reserves.index[0]).M2NS
 
 ax = (irt_reserves.iloc[:, 0] / m2_total).plot(
     figsize=(20, 10),
@@ -0,0 +1,250 @@
+from enum import Enum, unique
+
+import numpy as np
+import pandas as pd
+
+from pricing.series_providers import Frequency
+
+
+@unique
+class Aggregation(Enum):
+    """
+    How observations of a source falling into the same bucket are aggregated into its value
+    """
+
+    MEAN = 0
+    """
+    The mean of the observations, e.g. for downsampling daily yields to monthly averages
+    """
+
+    SUM = 1
+    """
+    The sum of the observations, e.g. for downsampling flows
+    """
+
+    LAST = 2
+    """
+    The latest of the observations, e.g. for downsampling end of period levels
+    """
+
+    FFILL = 3
+    """
+    The latest observation on or before the end of the bucket, buckets without observations carry the value
+    of the preceding one forward, e.g. for upsampling quarterly GDP to months
+    """
+
+
+class BucketAggregates:
+    """
+    Running aggregates of observations of a single source per bucket: their sum, their count and the latest
+    of them. Buckets are identified by consecutive ordinals of pandas.Period objects. Observations are folded
+    into the aggregates of their buckets as they arrive, revisions of earlier observations replace their
+    contributions.
+    """
+
+    def __init__(self, aggregation, decimals=None):
+        """
+        :param aggregation: a member of the Aggregation enum
+        :param decimals: the number of decimals to round values of buckets to, None to not round them
+        """
+        self.aggregation = aggregation
+        self.decimals = decimals
+        # The ordinal of the first bucket, None until the first observation arrives
+        self.start = None
+        self.sums = np.empty(0)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.last_dates = np.empty(0, dtype="datetime64[D]")
+        self.last_values = np.empty(0)
+        # Sorted dates and corresponding values of observations folded in so far, used for replacing
+        # contributions of revised ones
+        self.observed_dates = np.empty(0, dtype="datetime64[D]")
+        self.observed_values = np.empty(0)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def extend(self, first, last):
+        """
+        Extends the buckets to cover the ordinals in the range [first; last], new buckets are empty
+        """
+        if self.start is None:
+            self.start = first
+        before = max(self.start - first, 0)
+        after = max(last - (self.start + len(self) - 1), 0)
+        if before or after:
+            self.sums = np.pad(self.sums, (before, after))
+            self.counts = np.pad(self.counts, (before, after))
+            self.last_dates = np.concatenate(
+                [
+                    np.full(before, np.datetime64("NaT"), "datetime64[D]"),
+                    self.last_dates,
+                    np.full(after, np.datetime64("NaT"), "datetime64[D]"),
+                ]
+            )
+            self.last_values = np.pad(self.last_values, (before, after))
+            self.start -= before
+
+    def update(self, ordinals, dates, values):
+        """
+        Folds new or revised observations into the aggregates of their buckets, other buckets aren't touched.
+
+        :param ordinals: a numpy.ndarray of ordinals of the buckets of the observations
+        :param dates: a sorted numpy.ndarray of unique numpy.datetime64 dates of the observations
+        :param values: a numpy.ndarray of values of the observations, none of them numpy.nan
+        """
+        self.extend(ordinals[0], ordinals[-1])
+        rows = ordinals - self.start
+        positions = np.searchsorted(self.observed_dates, dates)
+        revised = positions < len(self.observed_dates)
+        revised[revised] = self.observed_dates[positions[revised]] == dates[revised]
+        previous = np.zeros(len(dates))
+        previous[revised] = self.observed_values[positions[revised]]
+        np.add.at(self.sums, rows, values - previous)
+        np.add.at(self.counts, rows, ~revised)
+
+        # As dates are sorted, the latest observation of each bucket is the last one in its run of rows
+        is_last = np.append(rows[1:] != rows[:-1], True)
+        last_rows, last_dates = rows[is_last], dates[is_last]
+        later = np.isnat(self.last_dates[last_rows]) | (
+            last_dates >= self.last_dates[last_rows]
+        )
+        self.last_dates[last_rows[later]] = last_dates[later]
+        self.last_values[last_rows[later]] = values[is_last][later]
+
+        # Revised observations are replaced in place, new ones are merged keeping the dates sorted
+        self.observed_values[positions[revised]] = values[revised]
+        observed_dates = np.concatenate([self.observed_dates, dates[~revised]])
+        observed_values = np.concatenate([self.observed_values, values[~revised]])
+        order = np.argsort(observed_dates, kind="stable")
+        self.observed_dates = observed_dates[order]
+        self.observed_values = observed_values[order]
+
+    def get_values(self):
+        """
+        Returns a numpy.ndarray of values of the buckets, numpy.nan for buckets without observations unless
+        the aggregation is Aggregation.FFILL
+        """
+        observed = self.counts > 0
+        if self.aggregation == Aggregation.MEAN:
+            values = np.divide(
+                self.sums,
+                self.counts,
+                out=np.full(len(self), np.nan),
+                where=observed,
+            )
+        elif self.aggregation == Aggregation.SUM:
+            values = np.where(observed, self.sums, np.nan)
+        elif self.aggregation in (Aggregation.LAST, Aggregation.FFILL):
+            values = np.where(observed, self.last_values, np.nan)
+            if self.aggregation == Aggregation.FFILL:
+                # The first bucket always has observations
+                values = values[
+                    np.maximum.accumulate(np.where(observed, np.arange(len(self)), 0))
+                ]
+        else:
+            raise ValueError("Unsupported aggregation: %s" % self.aggregation)
+        return values if self.decimals is None else values.round(self.decimals)
+
+
+class FrequencyAligner:
+    """
+    Aligns sources of mixed native frequencies on buckets of a single target frequency, e.g. months. Each source
+    is declared once with its native frequency and how its observations are aggregated, the engine keeps running
+    aggregates per bucket so that new or revised observations update only the buckets they fall into rather than
+    recomputing whole histories.
+    """
+
+    def __init__(self, freq="M"):
+        """
+        :param freq: a pandas period frequency of buckets, e.g. 'M' for months or 'Q' for quarters,
+                     buckets are labeled by their start dates
+        """
+        self.freq = freq
+        # BucketAggregates objects by names of sources
+        self.sources = {}
+
+    def get_bucket_days(self):
+        """
+        Returns the typical number of days in a bucket
+        """
+        period = pd.Period("2001-01-01", self.freq)
+        return (period.end_time - period.start_time).days + 1
+
+    def add_source(self, name, frequency, aggregation=None, decimals=None):
+        """
+        Declares a source.
+
+        :param name: the name of the source, typically a series ID
+        :param frequency: a member of the Frequency enum of the native frequency of the source
+        :param aggregation: a member of the Aggregation enum, if None sources of frequencies coarser than
+                            the buckets are forward filled and the others averaged
+        :param decimals: the number of decimals to round values of buckets to, None to not round them
+        """
+        assert isinstance(frequency, Frequency)
+        assert name not in self.sources
+        if aggregation is None:
+            aggregation = (
+                Aggregation.FFILL
+                if frequency.value > self.get_bucket_days()
+                else Aggregation.MEAN
+            )
+        self.sources[name] = BucketAggregates(aggregation, decimals)
+        return self
+
+    def update(self, observations):
+        """
+        Folds new or revised observations into the buckets they fall into, missing values are ignored.
+
+        :param observations: a pandas.DataFrame indexed by pandas.DatetimeIndex whose columns are names
+                             of declared sources, e.g. as returned by SeriesProvider.get_series
+        """
+        for name in observations.columns:
+            if name not in self.sources:
+                raise ValueError("Undeclared source: %s" % name)
+            series = observations[name].dropna()
+            series = series[~series.index.duplicated(keep="last")].sort_index()
+            if series.empty:
+                continue
+            index = pd.DatetimeIndex(series.index)
+            self.sources[name].update(
+                index.to_period(self.freq).asi8,
+                index.values.astype("datetime64[D]"),
+                series.to_numpy(np.float64),
+            )
+        return self
+
+    def get_frame(self, names=None, start=None, end=None):
+        """
+        Returns values of buckets of sources in the range of dates [start; end].
+
+        :param names: a list of names of sources or None for all of them
+        :param start: a datetime.date object or None to return the values of all buckets up to 'end'
+        :param end: a datetime.date object or None to return the values of all buckets since 'start'
+        :returns: a pandas.DataFrame indexed by pandas.DatetimeIndex of start dates of buckets whose columns
+                  are names of sources, numpy.nan for buckets without observations
+        """
+        names = list(self.sources) if names is None else list(names)
+        columns = []
+        for name in names:
+            aggregates = self.sources[name]
+            start_ordinal = 0 if aggregates.start is None else aggregates.start
+            ordinals = np.arange(start_ordinal, start_ordinal + len(aggregates))
+            columns.append(
+                pd.Series(
+                    aggregates.get_values(),
+                    index=pd.PeriodIndex.from_ordinals(
+                        ordinals, freq=self.freq
+                    ).to_timestamp(),
+                    name=name,
+                )
+            )
+        return (
+            pd.concat(columns, axis=1, sort=True)
+            .reindex(columns=names)
+            .rename_axis("DATE")
+            .loc[
+                None if start is None else pd.Timestamp(start) : (
+                    None if end is None else pd.Timestamp(end)
+                )
+            ]
+        )
@@ -0,0 +1,430 @@
+import numpy as np
+import pandas as pd
+
+from pricing.conventions import (
+    CONTINUOUS,
+    SEMIANNUAL,
+    from_continuous_compounding,
+)
+from pricing.curves import YieldCurve, YieldCurvePanel
+from pricing.scenarios import DEFAULT_NODES, get_interpolation_intervals
+
+
+def get_num_coupons(maturities, coupon_frequencies):
+    """
+    Returns the number of remaining coupons of bonds with times to maturity 'maturities' in years, maturities within
+    rounding errors of a coupon date are treated as falling on it.
+    """
+    return np.ceil(np.round(maturities * coupon_frequencies, 9)).astype(np.int64)
+
+
+def get_schedules(maturities, coupon_frequencies=2):
+    """
+    Returns coupon schedules of fixed coupon bonds laid out in a padded matrix. Coupons are paid every
+    '1 / coupon_frequency' years rolling backwards from maturity, hence the first coupon period might be short.
+
+    :param maturities: a numpy.ndarray of times to maturity in years
+    :param coupon_frequencies: an integer or a numpy.ndarray of integers designating how many times a year
+                               coupons are paid
+    :returns: a tuple of two numpy.ndarray objects of shape (len(maturities), max number of coupons), the first
+              holding coupon times in increasing order and the second holding bool values designating which elements
+              of the first one are actual coupons and not padding, coupons of every bond are left-aligned
+    """
+    maturities = np.asarray(maturities, dtype=np.float64)
+    coupon_frequencies = np.broadcast_to(coupon_frequencies, maturities.shape)
+    num_coupons = get_num_coupons(maturities, coupon_frequencies)
+    j = np.arange(num_coupons.max(initial=0))
+    mask = j < num_coupons[:, np.newaxis]
+    # The j-th coupon is due '(num_coupons - 1 - j) / coupon_frequency' years before maturity
+    times = (
+        maturities[:, np.newaxis]
+        - (num_coupons[:, np.newaxis] - 1 - j) / coupon_frequencies[:, np.newaxis]
+    )
+    return np.where(mask, times, 0.0), mask
+
+
+def get_discount_factors_for_times(curves, times):
+    """
+    Returns discount factors for times expressed in years relative to the starting date of 'curves'.
+
+    :param curves: a YieldCurve object, a YieldCurvePanel object or a list of YieldCurve objects
+    :param times: a numpy.ndarray of times in years
+    :returns: a numpy.ndarray of shape (len(times),) for a YieldCurve object and of shape
+              (number of curves, len(times)) otherwise
+    """
+    times = np.asarray(times, dtype=np.float64)
+    if isinstance(curves, YieldCurve):
+        # Many times map to the same date
+        dates, idx = np.unique(curves.to_maturity_dates(times), return_inverse=True)
+        return curves.get_discount_factors_for_maturity_dates(dates)[idx]
+    elif isinstance(curves, YieldCurvePanel):
+        return curves.get_discount_factors_for_maturities(times).to_numpy()
+    return np.stack([get_discount_factors_for_times(curve, times) for curve in curves])
+
+
+def value_asset_swaps(
+    coupon_rates, maturities, prices, curves, coupon_frequencies=2, notional=100.0
+):
+    """
+    Values par asset swaps on fixed coupon bonds against every curve in 'curves' at once. In a par asset swap
+    the investor buys a bond at par, pays its fixed coupons and receives floating rate payments on the same schedule
+    plus a spread, which offsets the difference between the bond's price and par. Floating rate payments are
+    projected and discounted off the same curve.
+
+    :param coupon_rates: a numpy.ndarray of annual coupon rates of the bonds
+    :param maturities: a numpy.ndarray of times to maturity of the bonds in years
+    :param prices: a numpy.ndarray of dirty prices of the bonds per 'notional'
+    :param curves: a YieldCurve object, a YieldCurvePanel object or a list of YieldCurve objects
+    :param coupon_frequencies: an integer or a numpy.ndarray of integers designating how many times a year
+                               coupons are paid
+    :param notional: the notional amount of the bonds and the swaps
+    :returns: a tuple of three numpy.ndarray objects holding present values of the fixed legs, present values of
+              the floating legs without the spread and par asset swap spreads as decimal fractions. Their shape is
+              (len(coupon_rates),) for a YieldCurve object and (number of curves, len(coupon_rates)) otherwise.
+    """
+    coupon_rates = np.asarray(coupon_rates, dtype=np.float64)
+    maturities = np.asarray(maturities, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    coupon_frequencies = np.broadcast_to(coupon_frequencies, maturities.shape)
+    times, mask = get_schedules(maturities, coupon_frequencies)
+
+    # Discount factors are evaluated once per distinct coupon time
+    unique_times, idx = np.unique(times[mask], return_inverse=True)
+    unique_discount_factors = get_discount_factors_for_times(curves, unique_times)
+    discount_factors = np.zeros(unique_discount_factors.shape[:-1] + times.shape)
+    discount_factors[..., mask] = unique_discount_factors[..., idx]
+
+    # Annuities of the floating legs, i.e. their present values per unit of spread and notional
+    annuities = (discount_factors / coupon_frequencies[:, np.newaxis]).sum(axis=-1)
+    final_discount_factors = discount_factors[
+        ..., np.arange(len(maturities)), mask.sum(axis=1) - 1
+    ]
+
+    fixed_leg_pvs = notional * coupon_rates * annuities
+    floating_leg_pvs = notional * (1.0 - final_discount_factors)
+    spreads = (fixed_leg_pvs + notional * final_discount_factors - prices) / (
+        notional * annuities
+    )
+    return fixed_leg_pvs, floating_leg_pvs, spreads
+
+
+class BondPortfolio:
+    """
+    A portfolio of bonds whose cashflows are packed in a compressed sparse row layout: cashflows of all bonds are
+    stored in flat arrays ordered by bond and 'offsets[i]:offsets[i + 1]' is the slice of cashflows of the i-th bond.
+    Cashflow times are stored as indices into the sorted array of distinct times, which are much fewer than
+    cashflows, so that discount factors are evaluated once per distinct time for the whole portfolio.
+    """
+
+    def __init__(self, times, amounts, offsets):
+        """
+        :param times: a numpy.ndarray of times of all cashflows in years ordered by bond
+        :param amounts: a numpy.ndarray of amounts of all cashflows corresponding to 'times'
+        :param offsets: a numpy.ndarray of len(bonds) + 1 non-decreasing indices into 'times' starting with 0 and
+                        ending with len(times)
+        """
+        offsets = np.asarray(offsets, dtype=np.int64)
+        assert len(times) == len(amounts) == offsets[-1] and offsets[0] == 0
+        assert np.all(np.diff(offsets) >= 0)
+        self.offsets = offsets
+        self.amounts = np.ascontiguousarray(amounts, dtype=np.float64)
+        self.unique_times, time_indices = np.unique(times, return_inverse=True)
+        self.time_indices = time_indices.astype(
+            np.min_scalar_type(max(len(self.unique_times) - 1, 0))
+        )
+
+    @classmethod
+    def from_fixed_coupon_bonds(
+        cls, coupon_rates, maturities, coupon_frequencies=2, notionals=100.0
+    ):
+        """
+        Constructs a portfolio of fixed coupon bonds whose schedules follow the same conventions as
+        get_schedules, without creating any per bond objects.
+
+        :param coupon_rates: a numpy.ndarray of annual coupon rates of the bonds
+        :param maturities: a numpy.ndarray of times to maturity of the bonds in years
+        :param coupon_frequencies: an integer or a numpy.ndarray of integers designating how many times a year
+                                   coupons are paid
+        :param notionals: a float value or a numpy.ndarray of notional amounts of the bonds
+        """
+        maturities = np.asarray(maturities, dtype=np.float64)
+        coupon_frequencies = np.broadcast_to(coupon_frequencies, maturities.shape)
+        notionals = np.broadcast_to(np.asarray(notionals, np.float64), maturities.shape)
+        num_coupons = get_num_coupons(maturities, coupon_frequencies)
+        offsets = np.concatenate([[0], np.cumsum(num_coupons)])
+
+        # Number of coupons following each cashflow of the same bond
+        remaining = np.repeat(offsets[1:], num_coupons) - 1 - np.arange(offsets[-1])
+        times = np.repeat(maturities, num_coupons) - remaining / np.repeat(
+            coupon_frequencies, num_coupons
+        )
+        amounts = np.repeat(
+            notionals * np.asarray(coupon_rates) / coupon_frequencies, num_coupons
+        ) + np.where(remaining == 0, np.repeat(notionals, num_coupons), 0.0)
+        return cls(times, amounts, offsets)
+
+    @classmethod
+    def from_cashflow_descriptors(cls, descriptors):
+        """
+        Constructs a portfolio from a list of :class:`~pricing.futures_rates.CashflowDescriptor` objects
+        """
+        return cls(
+            np.concatenate([cf.timeline for cf in descriptors]),
+            np.concatenate([cf.amounts for cf in descriptors]),
+            np.concatenate([[0], np.cumsum([len(cf.timeline) for cf in descriptors])]),
+        )
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def times(self):
+        """
+        Times of all cashflows in years ordered by bond
+        """
+        return self.unique_times[self.time_indices]
+
+    def get_present_values(self, curves):
+        """
+        Returns present values of all bonds of this portfolio discounted off 'curves', calculated with one
+        evaluation of discount factors for the distinct cashflow times and a segmented sum over bonds.
+
+        :param curves: a YieldCurve object, a YieldCurvePanel object or a list of YieldCurve objects
+        :returns: a numpy.ndarray of shape (len(self),) for a YieldCurve object and of shape
+                  (number of curves, len(self)) otherwise
+        """
+        discount_factors = get_discount_factors_for_times(curves, self.unique_times)
+        return self.sum_by_bond(discount_factors[..., self.time_indices] * self.amounts)
+
+    def sum_by_bond(self, values):
+        """
+        Sums 'values' corresponding to the cashflows of this portfolio over the cashflows of each bond.
+
+        :param values: a numpy.ndarray whose last axis corresponds to the cashflows of this portfolio
+        :returns: a numpy.ndarray whose last axis corresponds to the bonds of this portfolio
+        """
+        # numpy.add.reduceat doesn't handle empty segments, bonds without cashflows are summed separately
+        non_empty = self.offsets[:-1] < self.offsets[1:]
+        ret = np.zeros(values.shape[:-1] + (len(self),))
+        if np.any(non_empty):
+            ret[..., non_empty] = np.add.reduceat(
+                values, self.offsets[:-1][non_empty], axis=-1
+            )
+        return ret
+
+    def get_bond_indices(self):
+        """
+        Returns a numpy.ndarray holding the index of the bond each cashflow of this portfolio belongs to
+        """
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def get_discount_factor_derivatives(self, discount_rates):
+        """
+        Returns discount factors of all cashflows of this portfolio and their first and second derivatives with
+        respect to a parallel shift of 'discount_rates', all calculated in closed form.
+
+        :param discount_rates: a YieldCurve object whose yields are shifted in its compounding frequency,
+                               a continuously compounded flat rate or a numpy.ndarray of such rates, one per bond
+        :returns: a tuple of four numpy.ndarray objects with an element per cashflow: times in years
+                  the discount factors are calculated for, discount factors, their first and second derivatives
+        """
+        if isinstance(discount_rates, YieldCurve):
+            curve = discount_rates
+            dates, idx = np.unique(
+                curve.to_maturity_dates(self.unique_times), return_inverse=True
+            )
+            idx = idx[self.time_indices]
+            years = curve.to_years_for_maturity_dates(dates)[idx]
+            yields = curve.get_yields_for_maturity_dates(dates)[idx]
+            discount_factors = np.exp(-curve.to_continuous_compounding(yields) * years)
+
+            # Derivatives of continuously compounded yields with respect to the yields of the curve
+            if curve.comp_freq == CONTINUOUS:
+                dz, d2z = 1.0, 0.0
+            else:
+                dz = 1.0 / (1.0 + yields / curve.comp_freq)
+                d2z = -dz * dz / curve.comp_freq
+        else:
+            years = self.times
+            rates = np.broadcast_to(discount_rates, (len(self),))[
+                self.get_bond_indices()
+            ]
+            discount_factors = np.exp(-rates * years)
+            dz, d2z = 1.0, 0.0
+
+        first_derivatives = -years * dz * discount_factors
+        second_derivatives = (years * years * dz * dz - years * d2z) * discount_factors
+        return years, discount_factors, first_derivatives, second_derivatives
+
+    def get_risk_measures(self, discount_rates):
+        """
+        Returns present values and risk measures of all bonds of this portfolio calculated in closed form,
+        without repricing any bond.
+
+        :param discount_rates: a YieldCurve object, a continuously compounded flat rate or a numpy.ndarray of such
+                               rates, one per bond, see get_discount_factor_derivatives
+        :returns: a pandas.DataFrame with a row per bond and columns holding present values, Macaulay durations
+                  (for a YieldCurve the Fisher-Weil durations), modified durations, convexities and DV01s, i.e.
+                  decreases of present values per 1bp parallel increase of 'discount_rates'
+        """
+        years, discount_factors, first_derivatives, second_derivatives = (
+            self.get_discount_factor_derivatives(discount_rates)
+        )
+        pvs = self.sum_by_bond(self.amounts * discount_factors)
+        sensitivities = self.sum_by_bond(self.amounts * first_derivatives)
+        return pd.DataFrame(
+            {
+                "Present value": pvs,
+                "Macaulay duration": self.sum_by_bond(
+                    self.amounts * years * discount_factors
+                )
+                / pvs,
+                "Modified duration": -sensitivities / pvs,
+                "Convexity": self.sum_by_bond(self.amounts * second_derivatives) / pvs,
+                "DV01": -sensitivities * 1e-4,
+            }
+        )
+
+    def get_key_rate_dv01s(self, discount_rates, nodes=DEFAULT_NODES):
+        """
+        Returns decreases of present values of all bonds of this portfolio per 1bp increase of 'discount_rates' at
+        each of 'nodes' calculated in closed form. Shifts decrease linearly to zero at the adjacent nodes and are
+        flat beyond the first and the last node like key rate shifts of :class:`~pricing.scenarios.ScenarioSet`,
+        hence key rate DV01s of a bond sum up to its DV01.
+
+        :param discount_rates: a YieldCurve object, a continuously compounded flat rate or a numpy.ndarray of such
+                               rates, one per bond, see get_discount_factor_derivatives
+        :param nodes: a list or a numpy.ndarray of maturities in years in increasing order
+        :returns: a pandas.DataFrame with a row per bond and a column per node
+        """
+        nodes = np.asarray(nodes, dtype=np.float64)
+        years, _, first_derivatives, _ = self.get_discount_factor_derivatives(
+            discount_rates
+        )
+        intervals, fractions = get_interpolation_intervals(nodes, years)
+
+        # Every cashflow contributes to the two nodes of its interval
+        sensitivities = -self.amounts * first_derivatives * 1e-4
+        bins = self.get_bond_indices() * len(nodes) + intervals
+        key_rate_dv01s = np.bincount(
+            bins, sensitivities * (1.0 - fractions), minlength=len(self) * len(nodes)
+        ) + np.bincount(
+            bins + 1, sensitivities * fractions, minlength=len(self) * len(nodes)
+        )
+        return pd.DataFrame(
+            key_rate_dv01s.reshape(len(self), len(nodes)), columns=nodes
+        )
+
+    def get_yields_to_maturity(
+        self, prices, compounding_freq=SEMIANNUAL, tol=1e-12, max_iter=50
+    ):
+        """
+        Solves for yields to maturity of all bonds of this portfolio at once, see solve_for_spreads.
+
+        :param prices: a float value or a numpy.ndarray of dirty prices, one per bond
+        :param compounding_freq: how many times a year is the interest of the yields returned compounded,
+                                 0 implies continuous compounding
+        :param tol: iterations stop for a bond once its continuously compounded yield changes by no more than 'tol'
+        :param max_iter: the maximum number of iterations
+        :returns: a pandas.DataFrame with a row per bond and columns holding yields, the number of iterations run for
+                  each bond and residuals, i.e. differences between present values at the yields and 'prices'.
+                  Yields that didn't converge are set to NaN.
+        """
+        yields, iterations, residuals = self.solve_for_spreads(
+            prices, 1.0, tol, max_iter
+        )
+        return pd.DataFrame(
+            {
+                "Yield": from_continuous_compounding(yields, compounding_freq),
+                "Iterations": iterations,
+                "Residual": residuals,
+            }
+        )
+
+    def get_z_spreads(self, curve, prices, tol=1e-12, max_iter=50):
+        """
+        Solves for Z-spreads of all bonds of this portfolio over 'curve' at once, i.e. constant spreads added to
+        the continuously compounded zero rates of 'curve' that reprice the bonds to 'prices'. Discount factors of
+        'curve' are evaluated once per distinct cashflow time before iterating, see solve_for_spreads.
+
+        :param curve: a YieldCurve object
+        :param prices: a float value or a numpy.ndarray of dirty prices, one per bond
+        :param tol: iterations stop for a bond once its spread changes by no more than 'tol'
+        :param max_iter: the maximum number of iterations
+        :returns: a pandas.DataFrame with a row per bond and columns holding continuously compounded Z-spreads,
+                  the number of iterations run for each bond and residuals, i.e. differences between present values
+                  at the spreads and 'prices'. Spreads that didn't converge are set to NaN.
+        """
+        assert isinstance(curve, YieldCurve)
+        discount_factors = get_discount_factors_for_times(curve, self.unique_times)
+        spreads, iterations, residuals = self.solve_for_spreads(
+            prices, discount_factors[self.time_indices], tol, max_iter
+        )
+        return pd.DataFrame(
+            {"Z-spread": spreads, "Iterations": iterations, "Residual": residuals}
+        )
+
+    def solve_for_spreads(self, prices, discount_factors, tol=1e-12, max_iter=50):
+        """
+        Solves for continuously compounded spreads 's' such that discounting the cashflows of each bond with
+        'discount_factors * exp(-s * times)' reprices it to its price. Halley's method is run on all bonds
+        simultaneously using closed form derivatives of present values, every iteration being a single segmented
+        sum over all cashflows. Bonds that have converged keep their spreads while the others keep iterating.
+
+        :param prices: a float value or a numpy.ndarray of dirty prices, one per bond
+        :param discount_factors: a float value or a numpy.ndarray of base discount factors, one per cashflow
+        :param tol: iterations stop for a bond once its spread changes by no more than 'tol'
+        :param max_iter: the maximum number of iterations
+        :returns: a tuple of three numpy.ndarray objects with an element per bond holding spreads, set to NaN
+                  for bonds that didn't converge, the number of iterations run and residuals
+        """
+        prices = np.broadcast_to(np.asarray(prices, dtype=np.float64), (len(self),))
+        bond_indices = self.get_bond_indices()
+        times = self.times
+        discounted_amounts = self.amounts * discount_factors
+        # Moments of times weighted by discounted amounts are summed in one pass
+        weights = np.stack(
+            [
+                discounted_amounts,
+                discounted_amounts * times,
+                discounted_amounts * times * times,
+            ]
+        )
+
+        spreads = np.zeros(len(self))
+        iterations = np.zeros(len(self), dtype=np.int64)
+        converged = np.zeros(len(self), dtype=bool)
+        active = np.isfinite(prices) & (self.offsets[:-1] < self.offsets[1:])
+        for _ in range(max_iter):
+            if not np.any(active):
+                break
+            pv, f1, f2 = self.sum_by_bond(
+                weights * np.exp(-spreads[bond_indices] * times)
+            )
+            f = pv - prices
+            step = np.where(active, 2 * f * -f1 / (2 * f1 * f1 - f * f2), 0.0)
+            spreads -= step
+            iterations += active
+            done = active & (np.abs(step) <= tol)
+            converged |= done
+            active &= np.isfinite(step) & ~done
+
+        residuals = (
+            self.sum_by_bond(
+                discounted_amounts * np.exp(-spreads[bond_indices] * times)
+            )
+            - prices
+        )
+        return np.where(converged, spreads, np.nan), iterations, residuals
+
+    def get_memory_usage(self):
+        """
+        Returns a pandas.Series of the number of bytes used by each array of this portfolio, dividing their sum
+        by len(self) gives the memory used per bond.
+        """
+        return pd.Series(
+            {
+                name: getattr(self, name).nbytes
+                for name in ("offsets", "amounts", "unique_times", "time_indices")
+            }
+        )
@@ -0,0 +1,245 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+
+def get_easter_sundays(years):
+    """
+    Returns Easter Sundays of the Gregorian calendar for 'years' (the anonymous Gregorian algorithm).
+
+    :param years: a numpy.ndarray of years
+    :returns: a numpy.ndarray of numpy.datetime64[D] values
+    """
+    a = years % 19
+    b, c = np.divmod(years, 100)
+    d, e = np.divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = np.divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    day = (h + l - 7 * m + 33 * month + 19) % 32
+    return get_dates(years, month, day)
+
+
+def get_dates(years, months, days):
+    """
+    Returns dates composed of 'years', 'months' and 'days' as a numpy.ndarray of numpy.datetime64[D] values
+    """
+    return (
+        (np.asarray(years) - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+        + (np.asarray(months) - 1)
+    ).astype("datetime64[D]") + (np.asarray(days) - 1)
+
+
+def get_nth_weekdays(years, month, weekday, n):
+    """
+    Returns the n-th given weekday of 'month' for every year in 'years', n = -1 designates the last one.
+
+    :param years: a numpy.ndarray of years
+    :param month: a month number from 1 to 12
+    :param weekday: a weekday number where Monday is 0 and Sunday is 6
+    :param n: a positive number of the weekday in the month or -1 for the last one
+    :returns: a numpy.ndarray of numpy.datetime64[D] values
+    """
+    if n > 0:
+        first_days = get_dates(years, month, 1)
+        return np.busday_offset(
+            first_days, n - 1, roll="forward", weekmask=np.arange(7) == weekday
+        )
+    last_days = (
+        get_dates(years, month + 1, 1) - 1 if month < 12 else get_dates(years, 12, 31)
+    )
+    return np.busday_offset(
+        last_days, 0, roll="backward", weekmask=np.arange(7) == weekday
+    )
+
+
+def get_observed_holidays(holidays, observe_saturday=True):
+    """
+    Moves holidays falling on Sunday to the following Monday and, if 'observe_saturday' is True, holidays falling
+    on Saturday to the preceding Friday.
+    """
+    weekdays = (holidays.astype(np.int64) - 4) % 7
+    holidays = np.where(weekdays == 6, holidays + 1, holidays)
+    if observe_saturday:
+        holidays = np.where(weekdays == 5, holidays - 1, holidays)
+    return holidays
+
+
+def get_us_government_securities_holidays(start_year, end_year):
+    """
+    Returns full market close days of the US government securities market, approximating SIFMA's recommendations,
+    for years in the range [start_year; end_year).
+
+    :returns: a sorted numpy.ndarray of numpy.datetime64[D] values
+    """
+    years = np.arange(start_year, end_year)
+    mon, thu = 0, 3
+    holidays = [
+        # New Year's Day falling on Saturday is not observed on the preceding Friday
+        get_observed_holidays(get_dates(years, 1, 1), observe_saturday=False),
+        get_nth_weekdays(years[years >= 1998], 1, mon, 3),  # Martin Luther King Jr. Day
+        get_nth_weekdays(years, 2, mon, 3),  # Washington's Birthday
+        get_easter_sundays(years) - 2,  # Good Friday
+        get_nth_weekdays(years, 5, mon, -1),  # Memorial Day
+        get_observed_holidays(get_dates(years[years >= 2022], 6, 19)),  # Juneteenth
+        get_observed_holidays(get_dates(years, 7, 4)),  # Independence Day
+        get_nth_weekdays(years, 9, mon, 1),  # Labor Day
+        get_nth_weekdays(years, 10, mon, 2),  # Columbus Day
+        get_observed_holidays(get_dates(years, 11, 11)),  # Veterans Day
+        get_nth_weekdays(years, 11, thu, 4),  # Thanksgiving Day
+        get_observed_holidays(get_dates(years, 12, 25)),  # Christmas Day
+    ]
+    return np.unique(np.concatenate(holidays))
+
+
+class BusinessDayCalendar:
+    """
+    A business day calendar precomputed over a horizon of years so that rolling dates forward to the next
+    business day is a table lookup. Dates outside of the horizon are rolled with numpy.busday_offset.
+    Calendars defined in this module are pickled by reference, so that objects referring to them stay cheap to
+    pickle, other calendars are pickled as their holidays and are rebuilt when unpickled.
+    """
+
+    def __init__(
+        self,
+        holidays=(),
+        weekmask="1111100",
+        start_year=1970,
+        end_year=2080,
+        name=None,
+    ):
+        """
+        :param holidays: a list or a numpy.ndarray of dates that are not business days
+        :param weekmask: a numpy.busdaycalendar weekmask designating business days of the week, Monday first
+        :param start_year: the first year of the precomputed horizon
+        :param end_year: the year following the last year of the precomputed horizon
+        :param name: the name of the module level variable holding this calendar, if any
+        """
+        self.name = name
+        self.start_year = start_year
+        self.end_year = end_year
+        self.busdaycal = np.busdaycalendar(
+            weekmask=weekmask, holidays=np.asarray(holidays, dtype="datetime64[D]")
+        )
+        self.start = get_dates(start_year, 1, 1)
+        days = np.arange(self.start, get_dates(end_year, 1, 1))
+        self.is_business_day_bitmap = np.is_busday(days, busdaycal=self.busdaycal)
+        # Day offsets from 'start' of the next business day on or after each day of the horizon
+        self.rolled_forward = (
+            np.busday_offset(days, 0, roll="forward", busdaycal=self.busdaycal)
+            - self.start
+        ).astype(np.int64)
+
+    def __reduce__(self):
+        if self.name is not None:
+            return self.name
+        return (
+            BusinessDayCalendar,
+            (
+                self.busdaycal.holidays,
+                self.busdaycal.weekmask,
+                self.start_year,
+                self.end_year,
+            ),
+        )
+
+    def roll_forward(self, days):
+        """
+        Returns 'days' rolled forward to the next business day unless they are business days already.
+
+        :param days: a numpy.ndarray of numpy.datetime64[D] values
+        :returns: a numpy.ndarray of numpy.datetime64[D] values
+        """
+        days = np.asarray(days, dtype="datetime64[D]")
+        offsets = (days - self.start).astype(np.int64)
+        in_horizon = (offsets >= 0) & (offsets < len(self.rolled_forward))
+        if np.all(in_horizon):
+            return self.start + self.rolled_forward[offsets]
+        return np.where(
+            in_horizon,
+            self.start
+            + self.rolled_forward[np.clip(offsets, 0, len(self.rolled_forward) - 1)],
+            np.busday_offset(days, 0, roll="forward", busdaycal=self.busdaycal),
+        )
+
+    def roll_forward_date(self, dt):
+        """
+        Returns 'dt' rolled forward to the next business day as a datetime.date object.
+
+        :param dt: a datetime.date, datetime.datetime or pandas.Timestamp object
+        """
+        day = np.datetime64(
+            dt.date() if isinstance(dt, (datetime, pd.Timestamp)) else dt, "D"
+        )
+        return self.roll_forward(day).tolist()
+
+    def is_business_day(self, days):
+        """
+        Returns a numpy.ndarray of bool values designating which of 'days' are business days.
+
+        :param days: a numpy.ndarray of numpy.datetime64[D] values
+        """
+        days = np.asarray(days, dtype="datetime64[D]")
+        offsets = (days - self.start).astype(np.int64)
+        in_horizon = (offsets >= 0) & (offsets < len(self.is_business_day_bitmap))
+        return np.where(
+            in_horizon,
+            self.is_business_day_bitmap[
+                np.clip(offsets, 0, len(self.is_business_day_bitmap) - 1)
+            ],
+            np.is_busday(days, busdaycal=self.busdaycal),
+        )
+
+    def add_business_days(self, days, n):
+        """
+        Returns 'days' rolled forward to the next business day and shifted by 'n' business days.
+
+        :param days: a numpy.ndarray of numpy.datetime64[D] values or a datetime.date object
+        :param n: an integer or a numpy.ndarray of integers, negative values shift backwards
+        """
+        return np.busday_offset(
+            np.asarray(days, dtype="datetime64[D]"),
+            n,
+            roll="forward",
+            busdaycal=self.busdaycal,
+        )
+
+
+US_GOVERNMENT_SECURITIES = BusinessDayCalendar(
+    get_us_government_securities_holidays(1970, 2080), name="US_GOVERNMENT_SECURITIES"
+)
+"""
+The business day calendar of the US government securities market
+"""
+
+WEEKDAYS = BusinessDayCalendar(name="WEEKDAYS")
+"""
+A calendar whose business days are all weekdays, equivalent to pandas.tseries.offsets.BDay
+"""
+
+FOMC_MEETING_DATES = np.array(
+    """
+    2015-01-28 2015-03-18 2015-04-29 2015-06-17 2015-07-29 2015-09-17 2015-10-28 2015-12-16
+    2016-01-27 2016-03-16 2016-04-27 2016-06-15 2016-07-27 2016-09-21 2016-11-02 2016-12-14
+    2017-02-01 2017-03-15 2017-05-03 2017-06-14 2017-07-26 2017-09-20 2017-11-01 2017-12-13
+    2018-01-31 2018-03-21 2018-05-02 2018-06-13 2018-08-01 2018-09-26 2018-11-08 2018-12-19
+    2019-01-30 2019-03-20 2019-05-01 2019-06-19 2019-07-31 2019-09-18 2019-10-30 2019-12-11
+    2020-01-29 2020-03-03 2020-03-15 2020-04-29 2020-06-10 2020-07-29 2020-09-16 2020-11-05 2020-12-16
+    2021-01-27 2021-03-17 2021-04-28 2021-06-16 2021-07-28 2021-09-22 2021-11-03 2021-12-15
+    2022-01-26 2022-03-16 2022-05-04 2022-06-15 2022-07-27 2022-09-21 2022-11-02 2022-12-14
+    2023-02-01 2023-03-22 2023-05-03 2023-06-14 2023-07-26 2023-09-20 2023-11-01 2023-12-13
+    2024-01-31 2024-03-20 2024-05-01 2024-06-12 2024-07-31 2024-09-18 2024-11-07 2024-12-18
+    2025-01-29 2025-03-19 2025-05-07 2025-06-18 2025-07-30 2025-09-17 2025-10-29 2025-12-10
+    2026-01-28 2026-03-18 2026-04-29 2026-06-17 2026-07-29 2026-09-16 2026-10-28 2026-12-09
+    2027-01-27 2027-03-17 2027-04-28 2027-06-09 2027-07-28 2027-09-22 2027-10-27 2027-12-08
+    """.split(),
+    dtype="datetime64[D]",
+)
+"""
+Days of FOMC monetary policy decisions, i.e. the last days of scheduled meetings and the unscheduled meetings
+of March 2020 that changed the target range of the Fed Funds rate
+"""
@@ -0,0 +1,149 @@
+from enum import Enum, unique
+
+import numpy as np
+import pandas as pd
+
+CONTINUOUS = 0
+"""
+Compounding frequency designating continuous compounding
+"""
+
+ANNUAL = 1
+"""
+Compounding frequency designating annual compounding, i.e. annual percentage yields (APY)
+"""
+
+SEMIANNUAL = 2
+"""
+Compounding frequency designating semiannual compounding, used by US Treasury securities
+"""
+
+QUARTERLY = 4
+"""
+Compounding frequency designating quarterly compounding
+"""
+
+MONTHLY = 12
+"""
+Compounding frequency designating monthly compounding
+"""
+
+
+@unique
+class DayCount(Enum):
+    """
+    Day count conventions determining the number of days in a year rates are quoted for
+    """
+
+    ACT_360 = 0
+    """
+    Actual/360, used by money market instruments such as the Fed Funds rate
+    """
+
+    ACT_365 = 1
+    """
+    Actual/365 Fixed
+    """
+
+    ACT_ACT = 2
+    """
+    Actual/Actual, a year has 366 days in leap years and 365 days otherwise
+    """
+
+
+def is_leap_year(year):
+    """
+    Returns True if 'year' is a leap year, works element-wise on numpy.ndarray and pandas.Index values
+    """
+    return (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+
+def get_days_in_year(day_count, dates=None):
+    """
+    Returns the number of days in a year according to 'day_count' for each of 'dates'.
+
+    :param day_count: an instance of the DayCount enum
+    :param dates: a numpy.ndarray of numpy.datetime64 values or a pandas.DatetimeIndex, required by DayCount.ACT_ACT
+    :returns: a float value for DayCount.ACT_360 and DayCount.ACT_365, a numpy.ndarray for DayCount.ACT_ACT
+    """
+    if day_count == DayCount.ACT_360:
+        return 360.0
+    elif day_count == DayCount.ACT_365:
+        return 365.0
+    elif day_count == DayCount.ACT_ACT:
+        assert dates is not None
+        years = np.asarray(dates, dtype="datetime64[Y]").astype(np.int64) + 1970
+        return np.where(is_leap_year(years), 366.0, 365.0)
+    raise ValueError("Unsupported day count convention: %s" % day_count)
+
+
+def convert_day_count(rates, from_day_count, to_day_count, dates=None):
+    """
+    Converts simple annual rates from one day count convention to another, so that the interest accrued over
+    the same actual number of days stays the same.
+
+    :param rates: a float value, a numpy.ndarray, a pandas.Series or a pandas.DataFrame of rates
+    :param from_day_count: an instance of the DayCount enum 'rates' use
+    :param to_day_count: an instance of the DayCount enum to convert 'rates' to
+    :param dates: dates 'rates' are observed on, one per element of the first axis of 'rates', used only by
+                  DayCount.ACT_ACT. If None the index of a pandas.Series or a pandas.DataFrame is used.
+    :returns: an object of the same type and shape as 'rates'
+    """
+    if from_day_count == to_day_count:
+        return rates
+    if dates is None and isinstance(rates, (pd.Series, pd.DataFrame)):
+        dates = rates.index
+    factors = get_days_in_year(to_day_count, dates) / get_days_in_year(
+        from_day_count, dates
+    )
+    if isinstance(rates, pd.DataFrame):
+        return rates.mul(factors, axis=0)
+    return rates * np.reshape(factors, np.shape(factors) + (1,) * (np.ndim(rates) - 1))
+
+
+def to_continuous_compounding(rates, compounding_freq):
+    """
+    Converts annual rates compounded 'compounding_freq' times a year to continuously compounded rates.
+
+    :param rates: a float value, a numpy.ndarray, a pandas.Series or a pandas.DataFrame of rates
+    :param compounding_freq: how many times a year is the interest of 'rates' compounded, 0 implies continuous
+                             compounding
+    """
+    return (
+        rates
+        if compounding_freq == CONTINUOUS
+        else compounding_freq * np.log1p(rates / compounding_freq)
+    )
+
+
+def from_continuous_compounding(rates, compounding_freq):
+    """
+    Converts continuously compounded annual rates to rates compounded 'compounding_freq' times a year.
+
+    :param rates: a float value, a numpy.ndarray, a pandas.Series or a pandas.DataFrame of rates
+    :param compounding_freq: how many times a year is the interest of the returned rates compounded,
+                             0 implies continuous compounding
+    """
+    return (
+        rates
+        if compounding_freq == CONTINUOUS
+        else compounding_freq * np.expm1(rates / compounding_freq)
+    )
+
+
+def convert_compounding(rates, from_freq, to_freq):
+    """
+    Converts annual rates from one compounding frequency to another, e.g. converting CMT yields to APY is
+    'convert_compounding(rates, SEMIANNUAL, ANNUAL)'.
+
+    :param rates: a float value, a numpy.ndarray, a pandas.Series or a pandas.DataFrame of rates
+    :param from_freq: how many times a year is the interest of 'rates' compounded, 0 implies continuous compounding
+    :param to_freq: how many times a year is the interest of the returned rates compounded,
+                    0 implies continuous compounding
+    :returns: an object of the same type and shape as 'rates'
+    """
+    if from_freq == to_freq:
+        return rates
+    return from_continuous_compounding(
+        to_continuous_compounding(rates, from_freq), to_freq
+    )
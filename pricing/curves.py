@@ -1,12 +1,121 @@
+import sys
+from collections import OrderedDict
 from datetime import date, datetime, time, timedelta
 from enum import Enum, unique
-from functools import reduce
-from math import exp, log
+from math import factorial
+from time import localtime
 
 import numpy as np
 import pandas as pd
-from pandas.tseries.offsets import BDay
-from scipy.interpolate import InterpolatedUnivariateSpline
+from dateutil.relativedelta import relativedelta
+from scipy.interpolate import make_interp_spline
+
+from pricing.calendars import US_GOVERNMENT_SECURITIES
+from pricing.conventions import is_leap_year, to_continuous_compounding
+from pricing.interpolation import InterpolationMethod, build_interpolant
+
+
+def to_datetime64_days(dts):
+    """
+    Converts a collection of dates to a numpy.ndarray of numpy.datetime64[D] values, any time of day component
+    is discarded analogously to 'datetime.combine(dt, time())'.
+
+    :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date objects
+    """
+    return np.asarray(pd.DatetimeIndex(dts).values, dtype="datetime64[D]")
+
+
+def add_relativedeltas(days, offsets):
+    """
+    Adds every relativedelta in 'offsets' to every date in 'days' with the same semantics as 'date + offset',
+    i.e. years and months are added first with the day of month clipped to the length of the resulting month
+    and days are added afterwards.
+
+    :param days: a numpy.ndarray of numpy.datetime64[D] values
+    :param offsets: a list of relativedelta instances with no time of day components
+    :returns: a numpy.ndarray of numpy.datetime64[D] values of shape (len(days), len(offsets))
+    """
+    months = np.array([offset.years * 12 + offset.months for offset in offsets])
+    num_days = np.array([offset.days for offset in offsets])
+    days = np.asarray(days, dtype="datetime64[D]")[:, np.newaxis]
+    day_of_month = days - days.astype("datetime64[M]").astype("datetime64[D]")
+    target_months = days.astype("datetime64[M]") + months
+    last_days = (target_months + 1).astype("datetime64[D]") - 1
+    return (
+        np.minimum(target_months.astype("datetime64[D]") + day_of_month, last_days)
+        + num_days
+    )
+
+
+def local_utc_offsets(timestamps):
+    """
+    Returns the offsets of the local time zone from UTC in seconds at 'timestamps' as reported by
+    'time.localtime'. The offsets are sampled weekly over the range of 'timestamps' and every change is
+    bisected to the exact second, which assumes no two offset changes are less than a week apart.
+
+    :param timestamps: a numpy.ndarray of POSIX timestamps
+    :returns: a numpy.ndarray of int64 values
+    """
+    timestamps = np.floor(np.asarray(timestamps, dtype=np.float64)).astype(np.int64)
+    if timestamps.size == 0:
+        return np.zeros(timestamps.shape, dtype=np.int64)
+
+    week = 7 * 24 * 60 * 60
+    samples = np.arange(timestamps.min(), timestamps.max() + week, week)
+    offsets = np.array([localtime(int(t)).tm_gmtoff for t in samples], dtype=np.int64)
+    change_starts = [samples[0]]
+    for i in np.flatnonzero(offsets[1:] != offsets[:-1]):
+        lo, hi = int(samples[i]), int(samples[i + 1])
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if localtime(mid).tm_gmtoff == offsets[i]:
+                lo = mid
+            else:
+                hi = mid
+        change_starts.append(hi)
+    values = np.concatenate([offsets[:1], offsets[1:][offsets[1:] != offsets[:-1]]])
+    return values[np.searchsorted(change_starts, timestamps, side="right") - 1]
+
+
+def to_posix_timestamps(days, local_time=False):
+    """
+    Converts an array of numpy.datetime64[D] values to POSIX timestamps of their midnights. Midnights are
+    interpreted in UTC like 'pandas.Timestamp.timestamp()' does or, if 'local_time' is True, in the local time
+    zone like 'datetime.datetime.timestamp()' does for naive datetime objects.
+
+    :param days: a numpy.ndarray of numpy.datetime64[D] values
+    :param local_time: designates if midnights are to be interpreted in the local time zone
+    :returns: a numpy.ndarray of float64 values
+    """
+    t = np.asarray(days, dtype="datetime64[s]").astype(np.int64)
+    if local_time:
+        # Solves t = u + offset(u) for u the same way 'datetime.datetime.timestamp()' does, picking
+        # the earlier solution for ambiguous times and the later candidate for times in a gap
+        a = local_utc_offsets(t)
+        u1 = t - a
+        t1 = u1 + local_utc_offsets(u1)
+        b = np.where(t1 == t, local_utc_offsets(u1 - 24 * 60 * 60), t1 - u1)
+        u2 = t - b
+        t2 = u2 + local_utc_offsets(u2)
+        t = np.where(
+            (t1 == t) & (a == b),
+            u1,
+            np.where(t2 == t, u2, np.where(t1 == t, u1, np.maximum(u1, u2))),
+        )
+    return t.astype(np.float64)
+
+
+def from_posix_timestamps(timestamps):
+    """
+    Converts POSIX timestamps to the dates they fall on in the local time zone, i.e. a vectorized equivalent
+    of 'datetime.date.fromtimestamp(timestamp)'.
+
+    :param timestamps: a numpy.ndarray of float64 values
+    :returns: a numpy.ndarray of numpy.datetime64[D] values
+    """
+    seconds = np.floor(np.asarray(timestamps, dtype=np.float64)).astype(np.int64)
+    local_seconds = seconds + local_utc_offsets(seconds)
+    return (local_seconds // (24 * 60 * 60)).astype("datetime64[D]")
 
 
 @unique
@@ -34,10 +143,31 @@ class MaturityRepresentation(Enum):
 class YieldCurve:
     """
     A Yield curve defined by a list of {maturity, interest rate} pairs. This class uses Cubic splines by default
-    to interpolate when constructing the curve. See <a href="http://web.math.ku.dk/~rolf/HaganWest.pdf">this article</a>
-    for more details on interpolation methods.
+    to interpolate when constructing the curve, other methods can be selected with the
+    :class:`~pricing.interpolation.InterpolationMethod` enum.
+    See <a href="http://web.math.ku.dk/~rolf/HaganWest.pdf">this article</a> for more details on interpolation methods.
+
+    Curves are compact so that long histories of them can be kept in memory and sent to worker processes: knots are
+    a numpy.ndarray of POSIX timestamps, the interpolant is a piecewise polynomial whose coefficients are
+    a contiguous numpy.ndarray, there is no per instance __dict__ and the cache of curve points is created on first
+    use and not pickled.
     """
 
+    __slots__ = (
+        "timestamps",
+        "date",
+        "align_on_bd",
+        "calendar",
+        "comp_freq",
+        "k",
+        "interpolation",
+        "ppoly",
+        "_curve_points_cache",
+    )
+
+    # Maximum number of curve point series kept by get_curve_points and get_curve_points_indexed_by_maturities
+    CURVE_POINTS_CACHE_SIZE = 8
+
     def __init__(
         self,
         date,
@@ -46,6 +176,8 @@ class YieldCurve:
         k=3,
         align_on_business_days=True,
         compounding_freq=2,
+        interpolation=InterpolationMethod.SPLINE,
+        calendar=US_GOVERNMENT_SECURITIES,
     ):
         """
         Constructs a new curve based on specified maturities and rates.
@@ -58,35 +190,81 @@ class YieldCurve:
         :param align_on_business_days: designates if 'date' and other date values need to be aligned to a business
                                        date
         :param compounding_freq: how many times a year is the interest compounded, 0 implies continuous compounding
+        :param interpolation: an instance of the InterpolationMethod enum designating how to interpolate between
+                              the specified maturities
+        :param calendar: a BusinessDayCalendar object used for aligning dates on business days
         """
         assert len(maturities) == len(rates) >= 2
         assert compounding_freq >= 0 and isinstance(compounding_freq, int)
 
         dt = datetime.combine(date, time())
         if isinstance(maturities[0], float):
-            self.timestamps = list(maturities)
+            self.timestamps = np.array(maturities, dtype=np.float64)
+        elif align_on_business_days:
+            self.timestamps = to_posix_timestamps(
+                calendar.roll_forward([dt + maturity for maturity in maturities])
+            )
         else:
-            self.timestamps = [
-                (
-                    dt + maturity + (BDay(0) if align_on_business_days else timedelta())
-                ).timestamp()
-                for maturity in maturities
-            ]
+            self.timestamps = np.array(
+                [(dt + maturity).timestamp() for maturity in maturities]
+            )
 
         # Verify it is monotonically increasing
-        assert all(
-            self.timestamps[i] <= self.timestamps[i + 1]
-            for i in range(len(maturities) - 1)
-        )
+        assert np.all(np.diff(self.timestamps) >= 0)
+
+        self.date = calendar.roll_forward_date(date) if align_on_business_days else date
+        self.align_on_bd = align_on_business_days
+        self.calendar = calendar
+        self.comp_freq = compounding_freq
+        self.k = k
+        self.interpolation = interpolation
 
         # Discard numpy.nan datapoints
         mask = np.logical_not(np.isnan(rates))
-        self.ppoly = InterpolatedUnivariateSpline(
-            np.array(self.timestamps)[mask], np.array(rates)[mask], k=k
+        self.ppoly = build_interpolant(
+            interpolation,
+            self.timestamps[mask],
+            np.array(rates)[mask],
+            k=k,
+            x_ref=self.to_timestamps(np.array([self.date], dtype="datetime64[D]"))[0],
+            compounding_freq=compounding_freq,
+        )
+        self._curve_points_cache = None
+
+    def __getstate__(self):
+        # The cache of curve points is rebuilt on demand
+        return {
+            name: getattr(self, name)
+            for name in YieldCurve.__slots__
+            if name != "_curve_points_cache"
+        }
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._curve_points_cache = None
+
+    def get_memory_usage(self):
+        """
+        Returns a pandas.Series of the number of bytes used by this curve: the instance itself, its knots,
+        the arrays of its interpolant and the cached curve points. The calendar and the starting date are shared
+        or negligible and aren't counted.
+        """
+        return pd.Series(
+            {
+                "object": sys.getsizeof(self),
+                "timestamps": self.timestamps.nbytes,
+                "interpolant": self.ppoly.nbytes,
+                "curve points cache": (
+                    0
+                    if self._curve_points_cache is None
+                    else sum(
+                        points.memory_usage(deep=True)
+                        for points in self._curve_points_cache.values()
+                    )
+                ),
+            }
         )
-        self.date = (date + BDay(0)).date() if align_on_business_days else date
-        self.align_on_bd = align_on_business_days
-        self.comp_freq = compounding_freq
 
     def get_curve_dates(self):
         """
@@ -102,10 +280,7 @@ class YieldCurve:
 
         :param dt: a datetime.date object for which the yield needs to be calculated
         """
-        timestamp = (
-            datetime.combine(dt, time())
-            + (BDay(0) if self.align_on_bd else timedelta())
-        ).timestamp()
+        timestamp = self.align_datetime(dt).timestamp()
         assert self.timestamps[0] <= timestamp <= self.timestamps[-1]
         return self.ppoly(timestamp).tolist()
 
@@ -118,15 +293,45 @@ class YieldCurve:
         :returns: a discount factor such that any cashflow on date 'dt' should be multiplied
                   by value returned to obtain its NPV
         """
-        adjusted_datetime = datetime.combine(dt, time()) + (
-            BDay(0) if self.align_on_bd else timedelta()
-        )
+        adjusted_datetime = self.align_datetime(dt)
         timestamp = adjusted_datetime.timestamp()
         assert self.timestamps[0] <= timestamp <= self.timestamps[-1]
         ytm = self.ppoly(timestamp).tolist()
         num_years = YieldCurve.year_difference(self.date, adjusted_datetime.date())
         ytm = self.to_continuous_compounding(ytm)
-        return exp(-ytm * num_years)
+        return np.exp(-ytm * num_years).tolist()
+
+    def get_yields_for_maturity_dates(self, dts):
+        """
+        Returns the annual yields for maturities corresponding to 'dts', possibly aligned on the next business day.
+        This is a vectorized equivalent of calling get_yield_for_maturity_date for each element of 'dts'.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date
+                    objects for which the yields need to be calculated
+        :returns: a numpy.ndarray of yields
+        """
+        timestamps = self.to_timestamps(self.align_dates(dts))
+        assert np.all(
+            (self.timestamps[0] <= timestamps) & (timestamps <= self.timestamps[-1])
+        )
+        return self.ppoly(timestamps)
+
+    def get_discount_factors_for_maturity_dates(self, dts):
+        """
+        Returns the discount factors for maturities corresponding to 'dts', possibly aligned on the next business day.
+        This is a vectorized equivalent of calling get_discount_factor_for_maturity_date for each element of 'dts'.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date
+                    objects for which the discount factors need to be calculated
+        :returns: a numpy.ndarray of discount factors
+        """
+        days = self.align_dates(dts)
+        timestamps = self.to_timestamps(days)
+        assert np.all(
+            (self.timestamps[0] <= timestamps) & (timestamps <= self.timestamps[-1])
+        )
+        ytm = self.to_continuous_compounding(self.ppoly(timestamps))
+        return np.exp(-ytm * YieldCurve.year_difference(self.date, days))
 
     def get_forward_discount_factor_for_maturity_date(self, forward_datetime, dt):
         """
@@ -140,7 +345,7 @@ class YieldCurve:
         yfw, term_in_years = self.get_forward_yield_for_maturity_date(
             forward_datetime, dt
         )
-        return exp(-self.to_continuous_compounding(yfw) * term_in_years)
+        return np.exp(-self.to_continuous_compounding(yfw) * term_in_years).tolist()
 
     def get_forward_yield_for_maturity_date(self, forward_datetime, dt):
         """
@@ -169,25 +374,117 @@ class YieldCurve:
         yfw = (ytm * num_years_to_maturity - ytf * num_years_to_forward) / term
         return yfw, term
 
-    def to_continuous_compounding(self, rate):
-        return (
-            rate
-            if self.comp_freq == 0
-            else self.comp_freq * log(1 + rate / self.comp_freq)
+    def get_forward_yields_for_terms(self, forward_dts, terms):
+        """
+        Returns forward yields for every combination of a forward date in 'forward_dts' and a term in 'terms',
+        e.g. a row of 1y1y, 1y2y, 1y5y forwards for every forward date. This is a vectorized equivalent of calling
+        get_forward_yield_for_maturity_date(forward_datetime, forward_datetime + term) for each combination.
+
+        :param forward_dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list
+                            of datetime.date objects relative to which forward yields need to be calculated
+        :param terms: a list of relativedelta instances designating the terms of the forward yields
+        :returns: a tuple whose first element is a numpy.ndarray of shape (len(forward_dts), len(terms)) holding
+                  forward yields (expressed with a compounding frequency specified during the construction
+                  of this YieldCurve object) and the second a numpy.ndarray of the same shape holding the terms
+                  expressed in years
+        """
+        forward_days = to_datetime64_days(forward_dts)
+        maturity_days = add_relativedeltas(forward_days, terms)
+        forward_days = forward_days[:, np.newaxis]
+        timestamps = to_posix_timestamps(maturity_days, local_time=True)
+        forward_timestamps = to_posix_timestamps(forward_days, local_time=True)
+        assert np.all(
+            (self.timestamps[0] <= forward_timestamps)
+            & (forward_timestamps < timestamps)
+            & (timestamps <= self.timestamps[-1])
         )
+        ytm = self.ppoly(timestamps.ravel()).reshape(timestamps.shape)
+        ytf = self.ppoly(forward_timestamps.ravel()).reshape(forward_timestamps.shape)
+        num_years_to_maturity = YieldCurve.year_difference(self.date, maturity_days)
+        num_years_to_forward = YieldCurve.year_difference(self.date, forward_days)
+        # Recalculating is more accurate than 'term = num_years_to_maturity - num_years_to_forward'
+        term = YieldCurve.year_difference(forward_days, maturity_days)
+        yfw = (ytm * num_years_to_maturity - ytf * num_years_to_forward) / term
+        return yfw, term
+
+    def get_forward_discount_factors_for_terms(self, forward_dts, terms):
+        """
+        Returns forward discount factors for every combination of a forward date in 'forward_dts' and a term
+        in 'terms', each relative to its forward date. This is a vectorized equivalent of calling
+        get_forward_discount_factor_for_maturity_date(forward_datetime, forward_datetime + term)
+        for each combination.
+
+        :param forward_dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list
+                            of datetime.date objects relative to which discount factors need to be calculated
+        :param terms: a list of relativedelta instances designating the terms of the discount factors
+        :returns: a numpy.ndarray of shape (len(forward_dts), len(terms))
+        """
+        yfw, term_in_years = self.get_forward_yields_for_terms(forward_dts, terms)
+        return np.exp(-self.to_continuous_compounding(yfw) * term_in_years)
+
+    def to_continuous_compounding(self, rate):
+        return to_continuous_compounding(rate, self.comp_freq)
 
     def to_years(self, dt):
         """
         Converts 'dt' to a maturity expressed in years relative to the starting date of this curve
         :param dt: a datetime.date object that needs to be converted into maturity in years
         """
-        adjusted_datetime = datetime.combine(dt, time()) + (
-            BDay(0) if self.align_on_bd else timedelta()
-        )
+        adjusted_datetime = self.align_datetime(dt)
         timestamp = adjusted_datetime.timestamp()
         assert self.timestamps[0] <= timestamp <= self.timestamps[-1]
         return YieldCurve.year_difference(self.date, adjusted_datetime)
 
+    def to_years_for_maturity_dates(self, dts):
+        """
+        Converts 'dts' to maturities expressed in years relative to the starting date of this curve. This is
+        a vectorized equivalent of calling to_years for each element of 'dts'.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date
+                    objects that need to be converted into maturities in years
+        :returns: a numpy.ndarray of maturities in years
+        """
+        days = self.align_dates(dts)
+        timestamps = self.to_timestamps(days)
+        assert np.all(
+            (self.timestamps[0] <= timestamps) & (timestamps <= self.timestamps[-1])
+        )
+        return YieldCurve.year_difference(self.date, days)
+
+    def align_dates(self, dts):
+        """
+        Converts 'dts' to a numpy.ndarray of numpy.datetime64[D] values rolled forward to the next business day
+        if this curve aligns dates on business days.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date objects
+        """
+        days = to_datetime64_days(dts)
+        return self.calendar.roll_forward(days) if self.align_on_bd else days
+
+    def align_datetime(self, dt):
+        """
+        Returns 'dt' as a datetime at midnight rolled forward to the next business day if this curve aligns dates
+        on business days. Aligned values are naive pandas.Timestamp objects whose timestamps are relative to UTC,
+        other values are naive datetime.datetime objects whose timestamps are relative to the local time zone.
+
+        :param dt: a datetime.date object
+        """
+        return (
+            pd.Timestamp(self.calendar.roll_forward_date(dt))
+            if self.align_on_bd
+            else datetime.combine(dt, time())
+        )
+
+    def to_timestamps(self, days):
+        """
+        Converts 'days' to POSIX timestamps consistent with the scalar query methods of this curve. When aligning
+        on business days the scalar methods obtain a naive pandas.Timestamp whose timestamp is relative to UTC,
+        otherwise a naive datetime.datetime whose timestamp is relative to the local time zone.
+
+        :param days: a numpy.ndarray of numpy.datetime64[D] values, typically returned by align_dates
+        """
+        return to_posix_timestamps(days, local_time=not self.align_on_bd)
+
     def to_timedelta(self, delta_in_years):
         """
         Converts delta_in_years relative to the starting date of this curve into a datetime.timedelta object
@@ -211,6 +508,32 @@ class YieldCurve:
             else datetime.fromtimestamp(self.timestamps[0])
         )
 
+    def to_maturity_dates(self, deltas_in_years):
+        """
+        Converts maturities expressed in years relative to the starting date of this curve into the dates whose
+        maturities as calculated by year_difference are the closest to 'deltas_in_years'.
+
+        :param deltas_in_years: a numpy.ndarray of times in years from the starting date of this curve
+        :returns: a numpy.ndarray of numpy.datetime64[D] values
+        """
+        deltas_in_years = np.asarray(deltas_in_years, dtype=np.float64)
+        if deltas_in_years.size == 0:
+            return deltas_in_years.astype("datetime64[D]")
+
+        # A year is between 365 and 366 days long, hence the closest date is within a few days of the estimate.
+        # Maturities of candidate dates are looked up in a table spanning the range of 'deltas_in_years'.
+        estimates = np.round(deltas_in_years * 365.25).astype(np.int64)
+        first_day = estimates.min() - 3
+        days = np.datetime64(self.date, "D") + np.arange(first_day, estimates.max() + 4)
+        year_fractions = YieldCurve.year_difference(self.date, days)
+        candidates = (estimates - 3 - first_day)[..., np.newaxis] + np.arange(7)
+        errors = np.abs(year_fractions[candidates] - deltas_in_years[..., np.newaxis])
+        return days[
+            np.take_along_axis(
+                candidates, np.argmin(errors, axis=-1)[..., np.newaxis], axis=-1
+            )[..., 0]
+        ]
+
     def get_yield_for_maturity_timestamp(self, timestamp):
         """
         Returns the annual yield for maturity corresponding to 'timestamp'
@@ -227,19 +550,18 @@ class YieldCurve:
         :param n: the number of points to return, must be >= 2
         """
         assert n >= 2
-        delta = (self.timestamps[-1] - self.timestamps[0]) / (n - 1)
-        timestamps = [self.timestamps[0] + i * delta for i in range(n)]
-        pairs = list(
-            zip(
-                *[
-                    (date.fromtimestamp(timestamp), self.ppoly(timestamp).tolist())
-                    for timestamp in timestamps
-                ]
+        key = (n, None)
+        if not self.has_cached_curve_points(key):
+            timestamps, yields = self.get_curve_grid(n)
+            self.cache_curve_points(
+                key,
+                pd.Series(
+                    yields,
+                    index=pd.DatetimeIndex(from_posix_timestamps(timestamps)),
+                    name=str(self.date),
+                ),
             )
-        )
-        return pd.Series(
-            pairs[1], index=pd.DatetimeIndex(pairs[0]), name=str(self.date)
-        )
+        return self.get_cached_curve_points(key)
 
     def get_curve_points_indexed_by_maturities(
         self, n, maturity_repr=MaturityRepresentation.PANDAS_TIMEDELTA
@@ -253,37 +575,79 @@ class YieldCurve:
                               preferred way to express maturities in a returned panda.Series
         """
         assert n >= 2
-        delta = (self.timestamps[-1] - self.timestamps[0]) / (n - 1)
-        timestamps = [self.timestamps[0] + i * delta for i in range(n)]
-        pairs = list(
-            zip(
-                *[
-                    (
-                        date.fromtimestamp(timestamp) - self.date,
-                        self.ppoly(timestamp).tolist(),
-                    )
-                    for timestamp in timestamps
-                ]
+        key = (n, maturity_repr)
+        if not self.has_cached_curve_points(key):
+            timestamps, yields = self.get_curve_grid(n)
+            days = from_posix_timestamps(timestamps)
+            ret = pd.Series(
+                yields,
+                index=pd.TimedeltaIndex(
+                    (days - np.datetime64(self.date, "D")).astype("timedelta64[ns]")
+                ),
+                name=str(self.date),
             )
-        )
-        ret = pd.Series(pairs[1], index=pairs[0], name=str(self.date))
-        if maturity_repr != MaturityRepresentation.PANDAS_TIMEDELTA:
-            ret = ret.set_axis(ret.index.days)
-            if maturity_repr == MaturityRepresentation.YEARS:
-                # Compensation for leap years, dividing the number of days by 365 will incorrectly represent
-                # long maturities expressed in years
-                last_year = date.fromtimestamp(timestamps[-1]).year
-                num_leap_years = YieldCurve.get_num_leap_years(
-                    self.date.year, last_year
-                )
-                leap_years_add_on = (
-                    0
-                    if num_leap_years == 0
-                    else num_leap_years / (last_year - self.date.year)
-                )
-                num_years_index = ret.index / (365.0 + leap_years_add_on)
-                ret = ret.set_axis(num_years_index)
-        return ret
+            if maturity_repr != MaturityRepresentation.PANDAS_TIMEDELTA:
+                ret = ret.set_axis(ret.index.days)
+                if maturity_repr == MaturityRepresentation.YEARS:
+                    # Compensation for leap years, dividing the number of days by 365 will incorrectly represent
+                    # long maturities expressed in years
+                    last_year = days[-1].astype("datetime64[Y]").astype(int) + 1970
+                    num_leap_years = YieldCurve.get_num_leap_years(
+                        self.date.year, last_year
+                    )
+                    leap_years_add_on = (
+                        0
+                        if num_leap_years == 0
+                        else num_leap_years / (last_year - self.date.year)
+                    )
+                    num_years_index = ret.index / (365.0 + leap_years_add_on)
+                    ret = ret.set_axis(num_years_index)
+            self.cache_curve_points(key, ret)
+        return self.get_cached_curve_points(key)
+
+    def get_curve_grid(self, n):
+        """
+        Returns this yield curve's points evenly spaced as a tuple of two numpy.ndarray objects, the first holding
+        POSIX timestamps and the second the corresponding yields.
+
+        :param n: the number of points to return, must be >= 2
+        """
+        assert n >= 2
+        delta = (self.timestamps[-1] - self.timestamps[0]) / (n - 1)
+        timestamps = self.timestamps[0] + np.arange(n) * delta
+        return timestamps, self.ppoly(timestamps)
+
+    def has_cached_curve_points(self, key):
+        """
+        Returns True if curve points for 'key' are in the LRU cache of this curve.
+
+        :param key: a tuple of the number of points and the maturity representation (None for dates)
+        """
+        return self._curve_points_cache is not None and key in self._curve_points_cache
+
+    def cache_curve_points(self, key, points):
+        """
+        Stores curve points in the LRU cache of this curve, evicting the least recently used entry when
+        the cache holds more than CURVE_POINTS_CACHE_SIZE entries.
+
+        :param key: a tuple of the number of points and the maturity representation (None for dates)
+        :param points: a pandas.Series object to be cached
+        """
+        if self._curve_points_cache is None:
+            self._curve_points_cache = OrderedDict()
+        self._curve_points_cache[key] = points
+        if len(self._curve_points_cache) > YieldCurve.CURVE_POINTS_CACHE_SIZE:
+            self._curve_points_cache.popitem(last=False)
+
+    def get_cached_curve_points(self, key):
+        """
+        Returns a copy of the cached curve points for 'key' and marks them as the most recently used ones.
+
+        :param key: a tuple of the number of points and the maturity representation (None for dates)
+        """
+        self._curve_points_cache.move_to_end(key)
+        # Copying protects the cache from callers modifying the returned series
+        return self._curve_points_cache[key].copy()
 
     def parallel_shift(self, basis_points):
         """
@@ -292,74 +656,210 @@ class YieldCurve:
 
         :param basis_points: the number of basis points to add to the yields of this curve
         :return: a new YieldCurve object
+
+        See :class:`~pricing.scenarios.ScenarioSet` for evaluating many shocks without refitting the curve.
         """
-        rates = (
-            np.array([self.ppoly(ts).tolist() for ts in self.timestamps])
-            + basis_points * 1e-4
-        )
-        spline_degree = self.ppoly.__dict__["_data"][5]
+        rates = self.ppoly(self.timestamps) + basis_points * 1e-4
         return YieldCurve(
             self.date,
             self.timestamps,
             rates,
-            spline_degree,
+            self.k,
             align_on_business_days=self.align_on_bd,
             compounding_freq=self.comp_freq,
+            interpolation=self.interpolation,
+            calendar=self.calendar,
         )
 
     @staticmethod
     def is_leap_year(year):
-        return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+        """
+        Returns True if 'year' is a leap year, works element-wise on numpy.ndarray values
+        """
+        return is_leap_year(year)
 
     @staticmethod
     def get_num_leap_years(year_start, year_end):
         """
-        Returns the number of leap years in the range [year_start; year_end)
+        Returns the number of leap years in the range [year_start; year_end), works element-wise on
+        numpy.ndarray values
         """
-        return reduce(
-            lambda accu, year: accu + YieldCurve.is_leap_year(year),
-            range(year_start, year_end),
-            0,
+
+        # Number of leap years in the range [1; year]
+        def num_leap_years_until(year):
+            return year // 4 - year // 100 + year // 400
+
+        num_leap_years = np.maximum(
+            num_leap_years_until(year_end - 1) - num_leap_years_until(year_start - 1), 0
         )
+        return num_leap_years if np.ndim(num_leap_years) else int(num_leap_years)
 
     @staticmethod
     def year_difference(date1, date2):
         """
-        Calculates the difference between 'date2' and 'date1' in years teaking leap years into account
-
-        :param date1: a datetime.date or datetime.datetime instance
-        :param date2: a datetime.date or datetime.datetime instance
-        :return: a positive float value if date2 >= date1, a negative value otherwise
+        Calculates the difference between 'date2' and 'date1' in years teaking leap years into account. Both
+        arguments can be arrays in which case the difference is calculated element-wise.
+
+        :param date1: a datetime.date or datetime.datetime instance, or an array-like of such values
+                      or of numpy.datetime64 values
+        :param date2: a datetime.date or datetime.datetime instance, or an array-like of such values
+                      or of numpy.datetime64 values
+        :return: a positive float value if date2 >= date1, a negative value otherwise, or a numpy.ndarray of such
+                 values if any of the arguments is an array
         """
-        assert isinstance(date1, (date, datetime)) and isinstance(
-            date2, (date, datetime)
+        # Normalize to datetime64 with microsecond precision, the precision of datetime.datetime
+        date1 = np.asarray(date1, dtype="datetime64[us]")
+        date2 = np.asarray(date2, dtype="datetime64[us]")
+        year1 = date1.astype("datetime64[Y]")
+        year2 = date2.astype("datetime64[Y]")
+        feb_28_offset = np.timedelta64(31 + 27, "D")
+        year1_num = year1.astype(np.int64) + 1970
+        year2_num = year2.astype(np.int64) + 1970
+        is_leap_year1 = YieldCurve.is_leap_year(year1_num)
+        is_leap_year2 = YieldCurve.is_leap_year(year2_num)
+        num_years = year2_num - year1_num
+
+        num_leap_years = (
+            YieldCurve.get_num_leap_years(year1_num, year2_num + 1)
+            - (is_leap_year1 & (date1 > year1 + feb_28_offset))
+            - (is_leap_year2 & (date2 <= year2 + feb_28_offset))
         )
-        # Normalize to datetime
-        date1 = (
-            date1 if isinstance(date1, datetime) else datetime.combine(date1, time())
+        leap_years_add_on = np.where(
+            num_years == 0,
+            is_leap_year1 * 1.0,
+            np.where(
+                num_leap_years == 0,
+                0.0,
+                num_leap_years / np.where(num_years == 0, 1, num_years),
+            ),
         )
-        date2 = (
-            date2 if isinstance(date2, datetime) else datetime.combine(date2, time())
-        )
-        time_delta = date2 - date1
 
-        if date2.year == date1.year:
-            leap_years_add_on = 1 if YieldCurve.is_leap_year(date1.year) else 0
-        else:
-            num_leap_years = YieldCurve.get_num_leap_years(date1.year, date2.year + 1)
-            if date1 > datetime(date1.year, 2, 28) and YieldCurve.is_leap_year(
-                date1.year
-            ):
-                num_leap_years -= 1
-            if date2 <= datetime(date2.year, 2, 28) and YieldCurve.is_leap_year(
-                date2.year
-            ):
-                num_leap_years -= 1
-            leap_years_add_on = (
-                0 if num_leap_years == 0 else num_leap_years / (date2.year - date1.year)
-            )
+        # Like datetime.timedelta.days and datetime.timedelta.seconds, microseconds are ignored
+        time_delta = (date2 - date1) // np.timedelta64(1, "s")
+        days, seconds = np.divmod(time_delta, 24 * 60 * 60)
         # Less accurate
         # return (pd.to_datetime(date2) - pd.to_datetime(date1)) / np.timedelta64(1, 'Y')
-        return (time_delta.days + time_delta.seconds / (24.0 * 60 * 60)) / (
-            365.0 + leap_years_add_on
+        ret = (days + seconds / (24.0 * 60 * 60)) / (365.0 + leap_years_add_on)
+        return ret.tolist() if ret.ndim == 0 else ret
+
+
+class YieldCurvePanel:
+    """
+    A history of yield curves, one per date, sharing the same set of maturities. All curves are fitted in one batch
+    with interpolating splines of the same degree (equivalent to the splines used by
+    :class:`~pricing.curves.YieldCurve`) and stored as piecewise polynomials over the common grid of maturities
+    expressed in years. Queries evaluate all curves at once.
+    """
+
+    def __init__(self, data, maturities, k=3, compounding_freq=2):
+        """
+        Constructs a panel of curves from a date-indexed DataFrame.
+
+        :param data: a pandas.DataFrame indexed by pandas.DatetimeIndex whose columns hold yields for 'maturities'
+                     in increasing order, points with numpy.nan values are discarded for the affected curves
+        :param maturities: a list of maturities expressed in years as floats or a list of relativedelta instances
+        :param k: degree of the interpolating spline, an odd number
+        :param compounding_freq: how many times a year is the interest compounded, 0 implies continuous compounding
+        """
+        assert len(maturities) == data.shape[1] >= k + 1
+        # Only splines of odd degrees have their knots at the maturities being interpolated
+        assert k % 2 == 1
+        assert compounding_freq >= 0 and isinstance(compounding_freq, int)
+
+        self.maturities = np.array(
+            [
+                (
+                    maturity.years + maturity.months / 12.0 + maturity.days / 365.0
+                    if isinstance(maturity, relativedelta)
+                    else maturity
+                )
+                for maturity in maturities
+            ],
+            dtype=np.float64,
+        )
+        # Verify it is strictly increasing
+        assert np.all(np.diff(self.maturities) > 0)
+
+        self.dates = pd.DatetimeIndex(data.index)
+        self.k = k
+        self.comp_freq = compounding_freq
+
+        rates = data.to_numpy(dtype=np.float64)
+        # Polynomial coefficients per curve and interval of the maturity grid, the highest power first
+        self.coefficients = np.full(
+            (len(self.dates), len(self.maturities) - 1, k + 1), np.nan
+        )
+        self.min_maturities = np.full(len(self.dates), np.nan)
+        self.max_maturities = np.full(len(self.dates), np.nan)
+        self.last_intervals = np.zeros(len(self.dates), dtype=np.int64)
+
+        # Curves missing the same datapoints share their knots, hence are fitted together
+        masks, inverse = np.unique(~np.isnan(rates), axis=0, return_inverse=True)
+        for group, mask in enumerate(masks):
+            if mask.sum() < k + 1:
+                continue
+            rows = np.flatnonzero(inverse.ravel() == group)
+            x = self.maturities[mask]
+            spline = make_interp_spline(x, rates[np.ix_(rows, mask)].T, k=k)
+
+            # Knots are a subset of the maturity grid, hence the spline is a polynomial on every grid interval
+            intervals = np.flatnonzero(
+                (self.maturities[:-1] >= x[0]) & (self.maturities[1:] <= x[-1])
+            )
+            left_ends = self.maturities[intervals]
+            for power in range(k + 1):
+                self.coefficients[np.ix_(rows, intervals, [k - power])] = (
+                    spline(left_ends, nu=power).T / factorial(power)
+                )[:, :, np.newaxis]
+            self.min_maturities[rows] = x[0]
+            self.max_maturities[rows] = x[-1]
+            self.last_intervals[rows] = intervals[-1]
+
+    def get_yields_for_maturities(self, maturities):
+        """
+        Returns the annual yields for the specified maturities on every date of this panel, yields for maturities
+        outside of the range of a given curve are set to numpy.nan.
+
+        :param maturities: a list or a numpy.ndarray of maturities expressed in years
+        :returns: a pandas.DataFrame indexed by the dates of this panel with a column per maturity
+        """
+        maturities = np.asarray(maturities, dtype=np.float64)
+        intervals = np.searchsorted(self.maturities, maturities, side="right") - 1
+        # The last maturity of a curve belongs to its last interval
+        intervals = np.clip(
+            intervals[np.newaxis, :], 0, self.last_intervals[:, np.newaxis]
         )
+        dx = maturities - self.maturities[intervals]
+
+        # Horner's rule applied to all curves and maturities at once
+        rows = np.arange(len(self.dates))[:, np.newaxis]
+        ret = self.coefficients[rows, intervals, 0]
+        for power in range(1, self.k + 1):
+            ret = ret * dx + self.coefficients[rows, intervals, power]
+        ret[
+            (maturities < self.min_maturities[:, np.newaxis])
+            | (maturities > self.max_maturities[:, np.newaxis])
+        ] = np.nan
+        return pd.DataFrame(ret, index=self.dates, columns=maturities)
+
+    def get_yields_for_maturity(self, maturity):
+        """
+        Returns the annual yield for the specified maturity on every date of this panel.
+
+        :param maturity: a maturity expressed in years
+        :returns: a pandas.Series indexed by the dates of this panel
+        """
+        return self.get_yields_for_maturities([maturity]).iloc[:, 0].rename(maturity)
+
+    def get_discount_factors_for_maturities(self, maturities):
+        """
+        Returns discount factors for the specified maturities on every date of this panel.
+
+        :param maturities: a list or a numpy.ndarray of maturities expressed in years
+        :returns: a pandas.DataFrame indexed by the dates of this panel with a column per maturity
+        """
+        ytm = self.to_continuous_compounding(self.get_yields_for_maturities(maturities))
+        return np.exp(-ytm * ytm.columns.to_numpy())
+
+    def to_continuous_compounding(self, rate):
+        return to_continuous_compounding(rate, self.comp_freq)
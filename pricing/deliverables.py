@@ -0,0 +1,363 @@
+import numpy as np
+import pandas as pd
+
+from pricing.bonds import BondPortfolio
+from pricing.conventions import SEMIANNUAL
+
+
+def get_coupon_dates(maturity_dates, periods, coupon_frequency=SEMIANNUAL):
+    """
+    Returns dates of coupons due 'periods' coupon periods before 'maturity_dates'. Coupons of notes maturing
+    on the last day of a month are paid on the last days of months, otherwise on the day of the month of maturity
+    or the last day of shorter months.
+
+    :param maturity_dates: a numpy.ndarray of numpy.datetime64[D] values
+    :param periods: an integer or a numpy.ndarray of integers broadcastable against 'maturity_dates'
+    :param coupon_frequency: how many times a year coupons are paid
+    :returns: a numpy.ndarray of numpy.datetime64[D] values
+    """
+    maturity_dates = np.asarray(maturity_dates, dtype="datetime64[D]")
+    maturity_months = maturity_dates.astype("datetime64[M]")
+    days_of_month = maturity_dates - maturity_months.astype("datetime64[D]")
+    is_end_of_month = (
+        maturity_dates == (maturity_months + 1).astype("datetime64[D]") - 1
+    )
+
+    months = maturity_months - np.asarray(periods) * (12 // coupon_frequency)
+    month_ends = (months + 1).astype("datetime64[D]") - 1
+    return np.where(
+        is_end_of_month,
+        month_ends,
+        np.minimum(months.astype("datetime64[D]") + days_of_month, month_ends),
+    )
+
+
+def get_coupon_periods(days, maturity_dates, coupon_frequency=SEMIANNUAL):
+    """
+    Returns the coupon periods 'days' fall into, a coupon period starts on a coupon date and ends the day before
+    the next one.
+
+    :param days: a numpy.ndarray of numpy.datetime64[D] values
+    :param maturity_dates: a numpy.ndarray of numpy.datetime64[D] values broadcastable against 'days'
+    :param coupon_frequency: how many times a year coupons are paid
+    :returns: a tuple of three numpy.ndarray objects holding the previous coupon dates, the next coupon dates
+              and the numbers of coupons due after 'days'
+    """
+    days = np.asarray(days, dtype="datetime64[D]")
+    maturity_dates = np.asarray(maturity_dates, dtype="datetime64[D]")
+    months = (
+        maturity_dates.astype("datetime64[M]") - days.astype("datetime64[M]")
+    ).astype(np.int64)
+
+    # The coupon due this many periods before maturity falls in the month of 'days' or later,
+    # the one a period earlier falls before 'days'
+    periods = months // (12 // coupon_frequency)
+    periods = np.where(
+        get_coupon_dates(maturity_dates, periods, coupon_frequency) > days,
+        periods,
+        periods - 1,
+    )
+    return (
+        get_coupon_dates(maturity_dates, periods + 1, coupon_frequency),
+        get_coupon_dates(maturity_dates, periods, coupon_frequency),
+        np.maximum(periods + 1, 0),
+    )
+
+
+def get_conversion_factors(
+    coupon_rates, maturity_dates, delivery_months, round_to_quarters=True
+):
+    """
+    Returns CME conversion factors of Treasury notes and bonds, i.e. prices per unit of par yielding 6% with
+    semiannual compounding as of the first day of the delivery month, rounded to four decimal places.
+
+    :param coupon_rates: a numpy.ndarray of annual coupon rates
+    :param maturity_dates: a numpy.ndarray of numpy.datetime64[D] values broadcastable against 'coupon_rates'
+    :param delivery_months: a numpy.ndarray of numpy.datetime64[M] values broadcastable against 'maturity_dates'
+    :param round_to_quarters: whether the remaining term is rounded down to whole quarters, as for 10-Year T-Note
+                              and Treasury Bond futures, or to whole months, as for shorter T-Note futures
+    :returns: a numpy.ndarray of the broadcast shape
+    """
+    coupon_rates = np.asarray(coupon_rates, dtype=np.float64)
+    months = (
+        np.asarray(maturity_dates, dtype="datetime64[M]")
+        - np.asarray(delivery_months, dtype="datetime64[M]")
+    ).astype(np.int64)
+    n, z = np.divmod(months, 12)
+    if round_to_quarters:
+        z = z // 3 * 3
+
+    v = np.where(z < 7, z, z - 6)
+    a = 1.03 ** (-v / 6)
+    b = coupon_rates / 2 * (6 - v) / 6
+    c = 1.03 ** -np.where(z < 7, 2 * n, 2 * n + 1)
+    d = coupon_rates / 0.06 * (1 - c)
+    return np.round(a * (coupon_rates / 2 + c + d) - b, 4)
+
+
+class DeliverableBasket:
+    """
+    A basket of Treasury notes eligible for delivery into T-Note futures contracts. Conversion factors, basis and
+    implied repo rates are calculated for every note and every futures price of a history of prices at once,
+    laid out in matrices with a row per date and a column per note. Prices are quoted per 100 of par.
+    """
+
+    def __init__(
+        self,
+        coupon_rates,
+        maturity_dates,
+        names=None,
+        min_term=6.5,
+        max_term=8.0,
+        round_to_quarters=True,
+    ):
+        """
+        :param coupon_rates: a numpy.ndarray of annual coupon rates of the notes paid semiannually
+        :param maturity_dates: a numpy.ndarray of numpy.datetime64[D] values or a pandas.DatetimeIndex
+        :param names: a list of names of the notes, e.g. CUSIPs, by default composed of coupon rates
+                      and maturity dates
+        :param min_term: the minimum remaining term to maturity in years from the first day of the delivery month
+                         of an eligible note, the defaults correspond to the 10-Year T-Note futures contract
+        :param max_term: the maximum remaining term to maturity in years from the first day of the delivery month
+                         of an eligible note
+        :param round_to_quarters: whether remaining terms are rounded down to whole quarters
+                                  when calculating conversion factors, see get_conversion_factors
+        """
+        self.coupon_rates = np.asarray(coupon_rates, dtype=np.float64)
+        self.maturity_dates = np.asarray(maturity_dates, dtype="datetime64[D]")
+        assert self.coupon_rates.shape == self.maturity_dates.shape
+        self.names = pd.Index(
+            names
+            if names is not None
+            else [
+                "%.3f%% %s" % (coupon_rate * 100, maturity_date)
+                for coupon_rate, maturity_date in zip(
+                    self.coupon_rates, self.maturity_dates
+                )
+            ]
+        )
+        self.min_months = int(round(min_term * 12))
+        self.max_months = int(round(max_term * 12))
+        self.round_to_quarters = round_to_quarters
+
+    def __len__(self):
+        return len(self.coupon_rates)
+
+    def is_eligible(self, delivery_months):
+        """
+        Returns a numpy.ndarray of bool values of shape (len(delivery_months), len(self)) designating which notes
+        can be delivered in each of 'delivery_months'.
+
+        :param delivery_months: a numpy.ndarray of numpy.datetime64[M] values
+        """
+        delivery_months = np.asarray(delivery_months, dtype="datetime64[M]")[
+            :, np.newaxis
+        ]
+        return (
+            self.maturity_dates
+            >= (delivery_months + self.min_months).astype("datetime64[D]")
+        ) & (
+            self.maturity_dates
+            <= (delivery_months + self.max_months).astype("datetime64[D]")
+        )
+
+    def get_conversion_factors(self, delivery_months):
+        """
+        Returns conversion factors of all notes for each of 'delivery_months' as a numpy.ndarray of shape
+        (len(delivery_months), len(self)), conversion factors of notes that aren't eligible are set to NaN.
+
+        :param delivery_months: a numpy.ndarray of numpy.datetime64[M] values
+        """
+        delivery_months = np.asarray(delivery_months, dtype="datetime64[M]")
+        return np.where(
+            self.is_eligible(delivery_months),
+            get_conversion_factors(
+                self.coupon_rates,
+                self.maturity_dates,
+                delivery_months[:, np.newaxis],
+                self.round_to_quarters,
+            ),
+            np.nan,
+        )
+
+    def get_accrued_interest(self, days):
+        """
+        Returns interest accrued on all notes as of 'days' using the Actual/Actual day count convention
+        as a numpy.ndarray of shape (len(days), len(self)).
+
+        :param days: a numpy.ndarray of numpy.datetime64[D] values
+        """
+        days = np.asarray(days, dtype="datetime64[D]")[:, np.newaxis]
+        previous_coupons, next_coupons, _ = get_coupon_periods(
+            days, self.maturity_dates
+        )
+        return (
+            self.coupon_rates
+            * 50
+            * (days - previous_coupons).astype(np.float64)
+            / (next_coupons - previous_coupons).astype(np.float64)
+        )
+
+    def get_basis(
+        self, dates, futures_prices, delivery_dates, clean_prices, repo_rates=None
+    ):
+        """
+        Returns conversion factors, gross and net basis and implied repo rates of all notes for each date
+        of a history of futures prices. Notes are assumed to be bought on 'dates', financed until 'delivery_dates'
+        and delivered into the futures contract on 'delivery_dates'. A coupon paid in between is accounted for
+        by the implied repo rates, assuming it isn't reinvested.
+
+        :param dates: a numpy.ndarray of numpy.datetime64[D] values or a pandas.DatetimeIndex of settlement dates
+        :param futures_prices: a numpy.ndarray of futures prices, one per date
+        :param delivery_dates: a numpy.ndarray of numpy.datetime64[D] values, one per date, of the days the notes
+                               are delivered on, usually the last delivery day of the contract
+        :param clean_prices: a numpy.ndarray or a pandas.DataFrame of shape (len(dates), len(self)) holding
+                             clean prices of the notes, missing prices are NaN
+        :param repo_rates: a numpy.ndarray of repo rates using the Actual/360 day count convention, one per date,
+                           required to calculate carry and net basis
+        :returns: a pandas.DataFrame indexed by 'dates' whose columns are a pandas.MultiIndex of measures and notes.
+                  Measures are 'Conversion factor', 'Gross basis', 'Carry', 'Net basis' and 'Implied repo',
+                  all of them set to NaN for notes that aren't eligible or aren't priced.
+        """
+        measures = self._get_basis_matrices(
+            dates, futures_prices, delivery_dates, clean_prices, repo_rates
+        )
+        return pd.concat(
+            {
+                name: pd.DataFrame(
+                    measures[name], index=pd.DatetimeIndex(dates), columns=self.names
+                )
+                for name in (
+                    "Conversion factor",
+                    "Gross basis",
+                    "Carry",
+                    "Net basis",
+                    "Implied repo",
+                )
+            },
+            axis=1,
+        )
+
+    def get_cheapest_to_deliver(
+        self, dates, futures_prices, delivery_dates, clean_prices, repo_rates=None
+    ):
+        """
+        Returns the cheapest-to-deliver note for each date of a history of futures prices, i.e. the eligible note
+        with the highest implied repo rate, and the yield of that note as of the delivery date implied by
+        the futures price, which is the yield the futures price is actually quoting.
+
+        :param dates: see get_basis
+        :param futures_prices: see get_basis
+        :param delivery_dates: see get_basis
+        :param clean_prices: see get_basis
+        :param repo_rates: see get_basis
+        :returns: a pandas.DataFrame indexed by 'dates' with columns holding the name, coupon rate, maturity date,
+                  conversion factor, implied repo rate, net basis and forward yield of the cheapest-to-deliver
+                  note. Forward yields are compounded semiannually. Dates without any eligible priced note are
+                  set to NaN.
+        """
+        delivery_dates = np.asarray(delivery_dates, dtype="datetime64[D]")
+        measures = self._get_basis_matrices(
+            dates, futures_prices, delivery_dates, clean_prices, repo_rates
+        )
+        implied_repo = measures["Implied repo"]
+        has_ctd = np.any(np.isfinite(implied_repo), axis=1)
+        ctd = np.argmax(
+            np.where(np.isfinite(implied_repo), implied_repo, -np.inf), axis=1
+        )
+        rows = np.arange(len(ctd))
+
+        # Street convention yields of the cheapest-to-deliver notes, measuring time from the delivery dates
+        # in coupon periods, at their invoice prices
+        coupon_rates = self.coupon_rates[ctd]
+        previous_coupons, next_coupons, num_coupons = get_coupon_periods(
+            delivery_dates, self.maturity_dates[ctd]
+        )
+        periods = (
+            (next_coupons - delivery_dates).astype(np.float64)
+            / (next_coupons - previous_coupons).astype(np.float64)
+            + num_coupons
+            - 1
+        )
+        forward_yields = (
+            BondPortfolio.from_fixed_coupon_bonds(
+                coupon_rates, np.where(has_ctd, periods / 2, 0.0)
+            )
+            .get_yields_to_maturity(
+                np.where(has_ctd, measures["Invoice price"][rows, ctd], np.nan)
+            )["Yield"]
+            .to_numpy()
+        )
+
+        return pd.DataFrame(
+            {
+                "Note": pd.Series(self.names[ctd]).where(has_ctd).to_numpy(),
+                "Coupon rate": np.where(has_ctd, coupon_rates, np.nan),
+                "Maturity date": pd.DatetimeIndex(self.maturity_dates[ctd]).where(
+                    has_ctd
+                ),
+                "Conversion factor": measures["Conversion factor"][rows, ctd],
+                "Implied repo": implied_repo[rows, ctd],
+                "Net basis": measures["Net basis"][rows, ctd],
+                "Forward yield": forward_yields,
+            },
+            index=pd.DatetimeIndex(dates),
+        )
+
+    def _get_basis_matrices(
+        self, dates, futures_prices, delivery_dates, clean_prices, repo_rates
+    ):
+        days = np.asarray(dates, dtype="datetime64[D]")
+        delivery_dates = np.asarray(delivery_dates, dtype="datetime64[D]")
+        futures_prices = np.asarray(futures_prices, dtype=np.float64)[:, np.newaxis]
+        clean_prices = np.asarray(clean_prices, dtype=np.float64)
+        assert clean_prices.shape == (len(days), len(self))
+        assert len(futures_prices) == len(delivery_dates) == len(days)
+
+        conversion_factors = self.get_conversion_factors(
+            delivery_dates.astype("datetime64[M]")
+        )
+        accrued_interest = self.get_accrued_interest(days)
+        delivery_accrued_interest = self.get_accrued_interest(delivery_dates)
+
+        # A coupon is received if the next coupon after the purchase is due on or before delivery
+        _, next_coupons, _ = get_coupon_periods(
+            days[:, np.newaxis], self.maturity_dates
+        )
+        coupons = np.where(
+            next_coupons <= delivery_dates[:, np.newaxis], self.coupon_rates * 50, 0.0
+        )
+        days_to_delivery = (delivery_dates - days).astype(np.float64)[:, np.newaxis]
+        days_after_coupon = (delivery_dates[:, np.newaxis] - next_coupons).astype(
+            np.float64
+        )
+
+        invoice_prices = futures_prices * conversion_factors + delivery_accrued_interest
+        costs = clean_prices + accrued_interest
+        implied_repo = (
+            (invoice_prices + coupons - costs)
+            * 360
+            / (costs * days_to_delivery - coupons * days_after_coupon)
+        )
+        gross_basis = clean_prices - futures_prices * conversion_factors
+        if repo_rates is None:
+            carry = np.full(gross_basis.shape, np.nan)
+        else:
+            repo_rates = np.asarray(repo_rates, dtype=np.float64)[:, np.newaxis]
+            carry = (
+                delivery_accrued_interest
+                - accrued_interest
+                + coupons
+                - costs * repo_rates * days_to_delivery / 360
+            )
+            carry = np.where(np.isnan(gross_basis), np.nan, carry)
+        return {
+            "Conversion factor": np.where(
+                np.isfinite(clean_prices), conversion_factors, np.nan
+            ),
+            "Invoice price": invoice_prices,
+            "Gross basis": gross_basis,
+            "Carry": carry,
+            "Net basis": gross_basis - carry,
+            "Implied repo": implied_repo,
+        }
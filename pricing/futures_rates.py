@@ -1,12 +1,21 @@
+import warnings
 from datetime import date, datetime
-from math import exp
 
 import numpy as np
 import pandas as pd
-import pandas_datareader.data as web
-from dateutil.relativedelta import relativedelta
-from pandas.tseries.offsets import BDay, QuarterBegin
-from scipy.optimize import minimize_scalar
+
+from pricing.bonds import BondPortfolio
+from pricing.calendars import FOMC_MEETING_DATES, US_GOVERNMENT_SECURITIES
+from pricing.conventions import (
+    CONTINUOUS,
+    SEMIANNUAL,
+    DayCount,
+    convert_compounding,
+    convert_day_count,
+)
+from pricing.curves import YieldCurve, to_datetime64_days
+from pricing.replay import get_price_provider
+from pricing.scenarios import DEFAULT_NODES
 
 
 class CMEFixedIncomeFuturesRates:
@@ -17,14 +26,23 @@ class CMEFixedIncomeFuturesRates:
     # CME's convention for months starting from January
     MONTHS = ["F", "G", "H", "J", "K", "M", "N", "Q", "U", "V", "X", "Z"]
 
-    def __init__(self, cur_date):
+    # Calendar used for aligning dates on business days
+    CALENDAR = US_GOVERNMENT_SECURITIES
+
+    def __init__(self, cur_date, price_provider=None):
         """
         Constructs an instance to infer future rates from the prices of futures contracts.
 
         :param cur_date: a datetime.date or pandas.Timestamp object specifying the current month, relative to which
                          future rates are to be calculated
+        :param price_provider: a :class:`~pricing.price_providers.PriceProvider` object to retrieve prices of
+                               futures contracts from, if None it is selected by the environment, see
+                               :func:`~pricing.replay.get_price_provider`
         """
         assert isinstance(cur_date, (date, datetime, pd.Timestamp))
+        self.price_provider = (
+            get_price_provider() if price_provider is None else price_provider
+        )
         self.cur_date = (
             cur_date.date()
             if isinstance(cur_date, (datetime, pd.Timestamp))
@@ -41,17 +59,8 @@ class CMEFixedIncomeFuturesRates:
         :returns: a list of tuples where the first tuple component is the ticket symbol represented as a string
                   and the second is a date.date object rounded down to the start of the month
         """
-        months = [self.cur_date + relativedelta(months=+i) for i in range(1, n + 1)]
-        return [
-            (
-                ticker_prefix
-                + self.MONTHS[m.month - 1]
-                + str(m.year)[-2:]
-                + ticker_suffix,
-                date(m.year, m.month, 1),
-            )
-            for m in months
-        ]
+        months = np.datetime64(self.cur_date, "M") + np.arange(1, n + 1)
+        return self.get_tickers(months, ticker_prefix, ticker_suffix)
 
     def get_next_n_quarter_tickers(self, n, ticker_prefix="ZN", ticker_suffix=".CBT"):
         """
@@ -63,20 +72,48 @@ class CMEFixedIncomeFuturesRates:
         :returns: a list of tuples where the first tuple component is the ticket symbol represented as a string
                   and the second is a date.date object rounded down to the start of the month
         """
-        months = [
-            self.cur_date + i * QuarterBegin(startingMonth=3) for i in range(1, n + 1)
-        ]
+        # The first of March, June, September or December following the current date,
+        # equivalent to 'self.cur_date + QuarterBegin(startingMonth=3)'
+        cur_month = np.datetime64(self.cur_date, "M")
+        months_since_epoch = cur_month.astype(np.int64)
+        first_month = cur_month + (2 - months_since_epoch) % 3
+        if first_month == cur_month:
+            first_month += 3
+        return self.get_tickers(
+            first_month + 3 * np.arange(n), ticker_prefix, ticker_suffix
+        )
+
+    @classmethod
+    def get_tickers(cls, months, ticker_prefix, ticker_suffix):
+        """
+        Returns CME ticker symbols for contracts expiring in 'months'.
+
+        :param months: a numpy.ndarray of numpy.datetime64[M] values
+        :param ticker_prefix: a string designating a CME's ticker symbol prefix
+        :param ticker_suffix: a string designating a suffix for the ticker symbols returne
+        :returns: a list of tuples where the first tuple component is the ticket symbol represented as a string
+                  and the second is a date.date object rounded down to the start of the month
+        """
         return [
             (
                 ticker_prefix
-                + self.MONTHS[m.month - 1]
+                + cls.MONTHS[m.month - 1]
                 + str(m.year)[-2:]
                 + ticker_suffix,
-                date(m.year, m.month, 1),
+                m,
             )
-            for m in months
+            for m in months.astype("datetime64[D]").tolist()
         ]
 
+    def get_price_window_start(self, dt):
+        """
+        Returns the start of the window of business days prices of futures contracts are retrieved for
+        as of 'dt', equivalent to 'dt - BDay(3)' except that US government securities holidays are skipped.
+
+        :param dt: a datetime.date object
+        """
+        return self.CALENDAR.add_business_days(dt, -3).tolist()
+
     @staticmethod
     def from_actual_360_to_actual_actual(series):
         """
@@ -85,14 +122,7 @@ class CMEFixedIncomeFuturesRates:
         :param series: a pandas.Series object indexed by pandas.DatetimeIndex whose rates are to be converted
         :returns: a new pandas.Series object with rates using the actual/actual day count convention
         """
-        # Converting the Fed Funds Rate to actual/actual
-        leap_year_cond = series.index.year % 4 == 0 & (
-            (series.index.year % 100 != 0) | (series.index.year % 400 == 0)
-        )
-        ret = series.copy()
-        ret[leap_year_cond] *= 366.0 / 360
-        ret[np.invert(leap_year_cond)] *= 365.0 / 360
-        return ret
+        return convert_day_count(series, DayCount.ACT_360, DayCount.ACT_ACT)
 
     @staticmethod
     def from_continuous_compound_to_semiannual(series):
@@ -102,36 +132,81 @@ class CMEFixedIncomeFuturesRates:
         :param series: a pandas.Series object indexed by pandas.DatetimeIndex whose rates are to be converted
         :returns: a new pandas.Series object with rates using semiannual compounding frequency
         """
-        return 2.0 * (np.exp(series / 2.0) - 1.0)
+        return convert_compounding(series, CONTINUOUS, SEMIANNUAL)
 
     @staticmethod
     def tnote_price_to_yield(tnote_price, maturity=7):
         """
-        Converts an n-year T-Note/Bond futures price to a corresponding yield with semiannual compounding.
+        Converts an n-year T-Note/Bond futures price to a corresponding continuously compounded yield.
         The 10-year T-Note contract allows for delivery of any T-Note with fixed semi-annual coupons and
-        a remaining time to maturity of no less than 6.5 years and no more than 7.75 years.
+        a remaining time to maturity of no less than 6.5 years and no more than 8 years, see
+        :class:`~pricing.deliverables.DeliverableBasket` for yields of the actual cheapest-to-deliver notes.
 
         :param tnote_price: a float64 value representing the T-Note/Bond price
         :param maturity: an integer value representing the maturity of the T-Note/Bond that is expected to be delivered
         """
-
-        # CME T-Note/Bond futures contracts are priced assuming a 6% par yield and 6% yield to maturity
-        par_yield_tnote = CashflowDescriptor(0.06, 2, 100, maturity)
-        objective_func = lambda y: abs(
-            tnote_price - par_yield_tnote.pv_all_cashflows(y)
+        yields, converged = CMEFixedIncomeFuturesRates.tnote_prices_to_yields(
+            tnote_price, maturity
         )
-
-        # Looking for yields in the range of 0%-20%
-        res = minimize_scalar(objective_func, bounds=(0, 0.20), method="bounded")
-
-        if res.success:
-            print("Objective function: %.5f after %d iterations" % (-res.fun, res.nfev))
-            return res.x
+        if converged[0]:
+            return yields[0].tolist()
         else:
             raise ValueError(
-                "Optimizing the objective function with the passed T-Note price changes didn't succeed"
+                "Solving for the yield corresponding to the passed T-Note price didn't converge"
             )
 
+    @staticmethod
+    def tnote_prices_to_yields(tnote_prices, maturities=7, tol=1e-12, max_iter=50):
+        """
+        Converts n-year T-Note/Bond futures prices to corresponding continuously compounded yields, all at once.
+        Halley's method is run on all prices simultaneously using analytic derivatives of the price of
+        the cashflow schedule, see tnote_price_to_yield.
+
+        :param tnote_prices: a float64 value or a numpy.ndarray of T-Note/Bond prices
+        :param maturities: an integer value or a numpy.ndarray of maturities of the T-Notes/Bonds that are expected
+                           to be delivered, corresponding to 'tnote_prices'
+        :param tol: iterations stop for a price once its yield changes by no more than 'tol'
+        :param max_iter: the maximum number of iterations
+        :returns: a tuple of two numpy.ndarray objects, the first holding yields and the second holding bool values
+                  designating which of them converged, yields that didn't converge are set to NaN
+        """
+        tnote_prices = np.atleast_1d(np.asarray(tnote_prices, dtype=np.float64))
+        maturities = np.broadcast_to(maturities, tnote_prices.shape)
+        if tnote_prices.size == 0:
+            return np.empty(tnote_prices.shape), np.empty(
+                tnote_prices.shape, dtype=bool
+            )
+
+        # CME T-Note/Bond futures contracts are priced assuming a 6% par yield and 6% yield to maturity,
+        # schedules of different maturities share the same timeline padded with zero amounts
+        unique_maturities, idx = np.unique(maturities, return_inverse=True)
+        par_yield_tnotes = [
+            CashflowDescriptor(0.06, 2, 100, maturity) for maturity in unique_maturities
+        ]
+        timeline = max(par_yield_tnotes, key=lambda cf: len(cf.timeline)).timeline
+        amounts = np.zeros((len(par_yield_tnotes), len(timeline)))
+        for i, cf in enumerate(par_yield_tnotes):
+            amounts[i, : len(cf.amounts)] = cf.amounts
+        amounts = amounts[idx.reshape(tnote_prices.shape)]
+
+        yields = np.full(tnote_prices.shape, 0.06)
+        converged = np.zeros(tnote_prices.shape, dtype=bool)
+        active = np.isfinite(tnote_prices)
+        for _ in range(max_iter):
+            if not np.any(active):
+                break
+            y = yields[active]
+            pvs = amounts[active] * np.exp(-np.multiply.outer(y, timeline))
+            f = pvs.sum(axis=-1) - tnote_prices[active]
+            f1 = -(pvs @ timeline)
+            f2 = pvs @ (timeline * timeline)
+            step = 2 * f * f1 / (2 * f1 * f1 - f * f2)
+            yields[active] = y - step
+            done = np.abs(step) <= tol
+            converged[active] = done
+            active[active] = np.isfinite(step) & ~done
+        return np.where(converged, yields, np.nan), converged
+
 
 class CMEFedFundsFuturesRates(CMEFixedIncomeFuturesRates):
     """
@@ -139,8 +214,8 @@ class CMEFedFundsFuturesRates(CMEFixedIncomeFuturesRates):
     use the Actual/360 day count convention.
     """
 
-    def __init__(self, cur_date):
-        super().__init__(cur_date)
+    def __init__(self, cur_date, price_provider=None):
+        super().__init__(cur_date, price_provider)
 
     def get_rates_for_next_n_months(self, n, dt=None):
         """
@@ -159,13 +234,210 @@ class CMEFedFundsFuturesRates(CMEFixedIncomeFuturesRates):
             if isinstance(dt, (datetime, pd.Timestamp))
             else dt if isinstance(dt, date) else self.cur_date
         )
-        series = (
-            web.get_data_yahoo(tickers, dt - BDay(3), dt).loc[:, "Adj Close"].iloc[-1]
+        series = self.price_provider.get_last_prices(
+            list(tickers), dt, self.get_price_window_start(dt)
         )
         return ((100.0 - series.reindex(tickers)) / 100.0).set_axis(
             pd.DatetimeIndex(months)
         )
 
+    @classmethod
+    def get_rates_history(
+        cls, valuation_dates, n, price_provider, wide=True, ticker_prefix="ZQ"
+    ):
+        """
+        Returns the average future Fed Funds rates implied by Fed Funds Futures as of every date
+        in 'valuation_dates' for the next n months following it. This is equivalent to calling
+        get_rates_for_next_n_months on an instance initialized with each of the valuation dates, except that
+        prices of all contracts are retrieved from 'price_provider' in a single request.
+
+        :param valuation_dates: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of
+                                datetime.date objects
+        :param n: for how many months following each valuation date to return the average future Fed Funds rates
+        :param price_provider: a :class:`~pricing.price_providers.PriceProvider` object, typically
+                               a :class:`~pricing.price_providers.LocalPriceStore`
+        :param wide: if True returns a pandas.DataFrame indexed by valuation dates whose columns are contract months,
+                     otherwise a pandas.DataFrame with a row per valuation date and contract month
+        :param ticker_prefix: a string designating a CME's ticker symbol prefix
+        """
+        days = to_datetime64_days(valuation_dates)
+        months, tickers, rates = cls.get_rates_matrix(
+            days, n, price_provider, ticker_prefix
+        )
+        ret = pd.DataFrame(
+            {
+                "Valuation date": np.repeat(days, n).astype("datetime64[ns]"),
+                "Contract month": months.ravel().astype("datetime64[ns]"),
+                "Ticker": tickers.ravel(),
+                "Rate": rates.ravel(),
+            }
+        )
+        if wide:
+            return ret.pivot(
+                index="Valuation date", columns="Contract month", values="Rate"
+            )
+        return ret
+
+    @classmethod
+    def get_rates_matrix(cls, days, n, price_provider, ticker_prefix="ZQ"):
+        """
+        Returns a tuple of three numpy.ndarray objects of shape (len(days), n) holding contract months as
+        numpy.datetime64[M] values, ticker symbols and average future Fed Funds rates implied as of each of 'days'
+        for the next n months, see get_rates_history.
+
+        :param days: a numpy.ndarray of numpy.datetime64[D] values
+        """
+        window_starts = cls.CALENDAR.add_business_days(days, -3)
+
+        # Contract months for all valuation dates, each distinct contract is looked up only once
+        months = days.astype("datetime64[M]")[:, np.newaxis] + np.arange(1, n + 1)
+        unique_months, contracts = np.unique(months, return_inverse=True)
+        contracts = contracts.reshape(months.shape)
+        tickers = [
+            ticker
+            for ticker, _ in cls.get_tickers(unique_months, ticker_prefix, ".CBT")
+        ]
+
+        prices = price_provider.get_prices(
+            tickers, window_starts.min().tolist(), days.max().tolist()
+        )
+        price_days = to_datetime64_days(prices.index)
+
+        # The last day with prices in the window [window_start; valuation date] for each valuation date
+        rows = np.searchsorted(price_days, days, side="right") - 1
+        valid = rows >= 0
+        valid[valid] = price_days[rows[valid]] >= window_starts[valid]
+        values = (
+            prices.to_numpy(dtype=np.float64)[
+                np.maximum(rows, 0)[:, np.newaxis], contracts
+            ]
+            if len(prices)
+            else np.full(months.shape, np.nan)
+        )
+        rates = np.where(valid[:, np.newaxis], (100.0 - values) / 100.0, np.nan)
+        return months, np.asarray(tickers)[contracts], rates
+
+    @classmethod
+    def get_meeting_rates_history(
+        cls,
+        valuation_dates,
+        n,
+        price_provider,
+        meeting_dates=FOMC_MEETING_DATES,
+        move_size=0.0025,
+        ticker_prefix="ZQ",
+    ):
+        """
+        Returns the Fed Funds rates implied by Fed Funds Futures to prevail after each FOMC meeting whose decision
+        takes effect within the next n months following every date in 'valuation_dates', together with
+        the probabilities of the moves bracketing the implied change.
+
+        Decisions are assumed to take effect on the day following a meeting. The rate between consecutive meetings
+        is constant, hence the average rate implied by each contract is a day-weighted average of the rates before
+        and after the meetings in its month. These equations are solved in the least squares sense for all
+        valuation dates at once, rates no contract with a known price depends on are NaN. The implied change at each
+        meeting is attributed to the two neighbouring multiples of 'move_size' with probabilities proportional to
+        its distance from the other one.
+
+        :param valuation_dates: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of
+                                datetime.date objects
+        :param n: how many contract months following each valuation date to use
+        :param price_provider: a :class:`~pricing.price_providers.PriceProvider` object, typically
+                               a :class:`~pricing.price_providers.LocalPriceStore`
+        :param meeting_dates: a sorted numpy.ndarray of numpy.datetime64[D] values designating days of
+                              FOMC decisions, see :data:`~pricing.calendars.FOMC_MEETING_DATES`. They are assumed
+                              to list all decisions of the years they span, no decisions are assumed outside
+                              of them and a warning is issued if the horizon of any valuation date extends there.
+        :param move_size: the size of moves of the Fed Funds target rate as a decimal fraction
+        :param ticker_prefix: a string designating a CME's ticker symbol prefix
+        :returns: a pandas.DataFrame with a row per valuation date and meeting
+        """
+        days = to_datetime64_days(valuation_dates)
+        months, _, rates = cls.get_rates_matrix(days, n, price_provider, ticker_prefix)
+
+        # Day numbers of contract months [month_starts; month_ends) and of decisions taking effect
+        month_starts = months.astype("datetime64[D]").astype(np.int64)
+        month_ends = (months + 1).astype("datetime64[D]").astype(np.int64)
+        meeting_dates = np.asarray(meeting_dates, dtype="datetime64[D]")
+        effective_days = meeting_dates.astype(np.int64) + 1
+
+        # Meetings are known only for the years 'meeting_dates' span, outside of them horizons seem to have none
+        covered_years = meeting_dates[[0, -1]].astype("datetime64[Y]")
+        uncovered = (months[:, 0] < covered_years[0]) | (
+            months[:, -1] >= covered_years[1] + 1
+        )
+        if uncovered.any():
+            warnings.warn(
+                "FOMC meeting dates are known for %s-%s only, horizons of %s extend beyond them, "
+                "no further meetings are assumed"
+                % (covered_years[0], covered_years[1], days[uncovered])
+            )
+        bounds = np.concatenate(
+            [[np.iinfo(np.int64).min], effective_days, [np.iinfo(np.int64).max]]
+        )
+
+        # Rates between consecutive decisions are segments, numbered from the one in effect at the horizon start
+        first_segments = np.searchsorted(
+            effective_days, month_starts[:, 0], side="right"
+        )
+        num_meetings = (
+            np.searchsorted(effective_days, month_ends[:, -1] - 1, side="right")
+            - first_segments
+        )
+        segments = first_segments[:, np.newaxis] + np.arange(num_meetings.max() + 1)
+        # Rows with fewer meetings than others are padded with empty segments past the last decision
+        segment_starts = bounds[np.minimum(segments, len(bounds) - 1)]
+        segment_ends = bounds[np.minimum(segments + 1, len(bounds) - 1)]
+
+        # Fractions of days of each contract month (axis 1) during which each segment (axis 2) is in effect
+        overlaps = np.minimum(
+            month_ends[:, :, np.newaxis], segment_ends[:, np.newaxis, :]
+        ) - np.maximum(month_starts[:, :, np.newaxis], segment_starts[:, np.newaxis, :])
+        weights = (
+            np.maximum(overlaps, 0) / (month_ends - month_starts)[:, :, np.newaxis]
+        )
+        known = ~np.isnan(rates)
+        weights *= known[:, :, np.newaxis]
+
+        # Least squares solutions of 'weights @ segment_rates = rates' for all valuation dates,
+        # a segment rate is identified if it's in the row space of the weights
+        pinv = np.linalg.pinv(weights)
+        segment_rates = (pinv @ np.where(known, rates, 0.0)[:, :, np.newaxis])[..., 0]
+        identified = np.abs(np.diagonal(pinv @ weights, axis1=1, axis2=2) - 1.0) < 1e-8
+        segment_rates[~identified] = np.nan
+
+        # Meetings j >= 1 separate segments j - 1 and j
+        row_idx, meeting_idx = np.nonzero(
+            np.arange(1, num_meetings.max() + 1) <= num_meetings[:, np.newaxis]
+        )
+        pre_rates = segment_rates[row_idx, meeting_idx]
+        post_rates = segment_rates[row_idx, meeting_idx + 1]
+        changes = post_rates - pre_rates
+        # Changes within rounding errors of a multiple of 'move_size' are treated as that multiple
+        steps = np.round(changes / move_size, 9)
+        lower_steps = np.floor(steps)
+        upper_probs = steps - lower_steps
+
+        return pd.DataFrame(
+            {
+                "Valuation date": days[row_idx].astype("datetime64[ns]"),
+                "Meeting date": (
+                    effective_days[first_segments[row_idx] + meeting_idx] - 1
+                )
+                .astype("datetime64[D]")
+                .astype("datetime64[ns]"),
+                "Pre-meeting rate": pre_rates,
+                "Post-meeting rate": post_rates,
+                "Lower move": lower_steps * move_size,
+                "Upper move": (lower_steps + 1) * move_size,
+                "Upper move probability": upper_probs,
+                "Hike probability": (1 - upper_probs) * (lower_steps > 0)
+                + upper_probs * (lower_steps + 1 > 0),
+                "Cut probability": (1 - upper_probs) * (lower_steps < 0)
+                + upper_probs * (lower_steps + 1 < 0),
+            }
+        )
+
 
 class CME10YearTNoteFuturesYields(CMEFixedIncomeFuturesRates):
     """
@@ -174,8 +446,8 @@ class CME10YearTNoteFuturesYields(CMEFixedIncomeFuturesRates):
     10-year T-Note yield given that CME allows deliever of T-Notes with maturity of 6.5 years and more.
     """
 
-    def __init__(self, cur_date):
-        super().__init__(cur_date)
+    def __init__(self, cur_date, price_provider=None):
+        super().__init__(cur_date, price_provider)
 
     def get_yields_for_next_n_quarters(self, n, dt=None):
         """
@@ -185,20 +457,67 @@ class CME10YearTNoteFuturesYields(CMEFixedIncomeFuturesRates):
         tickers, months = list(zip(*self.get_next_n_quarter_tickers(n)))
         dt = (
             dt.date()
-            if instance(dt, (datetime, pd.Timestamp))
+            if isinstance(dt, (datetime, pd.Timestamp))
             else dt if isinstance(dt, date) else self.cur_date
         )
-        series = (
-            web.get_data_yahoo(tickers, dt - BDay(3), dt).loc[:, "Adj Close"].iloc[-1]
+        series = self.price_provider.get_last_prices(
+            list(tickers), dt, self.get_price_window_start(dt)
         )
         series = series.reindex(tickers).set_axis(pd.DatetimeIndex(months)).dropna()
-        series2 = series.apply(self.tnote_price_to_yield)
-        return self.from_continuous_compound_to_semiannual(series2)
+        yields, converged = self.tnote_prices_to_yields(series.values)
+        if not np.all(converged):
+            raise ValueError(
+                "Solving for the yields corresponding to prices of %s didn't converge"
+                % ", ".join(series.index[~converged].strftime("%Y-%m-%d"))
+            )
+        return self.from_continuous_compound_to_semiannual(
+            pd.Series(yields, index=series.index)
+        )
+
+    def get_ctd_yields_for_next_n_quarters(
+        self, n, basket, clean_prices, dt=None, repo_rate=None
+    ):
+        """
+        Returns a pandas.DataFrame indexed by pandas.DatetimeIndex of contract months describing the
+        cheapest-to-deliver note of each of the next n quarterly contracts, its 'Forward yield' column holds
+        the yields quoted by the futures prices. Notes are assumed to be delivered on the last business day of
+        the contract month.
+
+        :param n: for how many quarters to return cheapest-to-deliver notes
+        :param basket: a :class:`~pricing.deliverables.DeliverableBasket` object of notes that can be delivered
+        :param clean_prices: a pandas.Series indexed by the names of the notes of 'basket' holding their
+                             clean prices as of 'dt'
+        :param dt: datetime.date or pandas.Timestamp object specifying a past business day to use for retrieving
+                   the prices of T-Note futures contracts, if set to None the current date this instance was
+                   initialized with will be used.
+        :param repo_rate: the term repo rate using the Actual/360 day count convention used for net basis
+        """
+        tickers, months = list(zip(*self.get_next_n_quarter_tickers(n)))
+        dt = (
+            dt.date()
+            if isinstance(dt, (datetime, pd.Timestamp))
+            else dt if isinstance(dt, date) else self.cur_date
+        )
+        futures_prices = self.price_provider.get_last_prices(
+            list(tickers), dt, self.get_price_window_start(dt)
+        )
+        months = np.array(months, dtype="datetime64[M]")
+        delivery_dates = self.CALENDAR.add_business_days(
+            (months + 1).astype("datetime64[D]"), -1
+        )
+        return basket.get_cheapest_to_deliver(
+            np.full(n, np.datetime64(dt, "D")),
+            futures_prices.to_numpy(),
+            delivery_dates,
+            np.tile(clean_prices.reindex(basket.names).to_numpy(), (n, 1)),
+            None if repo_rate is None else np.full(n, repo_rate),
+        ).set_axis(pd.DatetimeIndex(months))
 
 
 class CashflowDescriptor:
     """
-    Represents cashflow schedules
+    Represents cashflow schedules. Amounts due at each point of the schedule are precomputed so that present values
+    are dot products of these amounts and discount factors, which can be obtained for many discount rates at once.
     """
 
     def __init__(self, coupon_rate, coupon_frequency, notional, T):
@@ -217,50 +536,138 @@ class CashflowDescriptor:
             self.coupon_interval, T + self.coupon_interval, self.coupon_interval
         )
         self.coupon_amount = notional * coupon_rate * self.coupon_interval
+        self.notional_amounts = np.where(self.timeline == T, float(notional), 0.0)
+        self.amounts = self.coupon_amount + self.notional_amounts
 
-    def cashflow(self, t, coupon_rate=None):
+    def get_amounts(self, coupon_rate=None):
         """
-        :param t: future time in years
-        :param coupon_rates: a different coupon rate from self.coupon_rate, might be handy when valuing asset swaps
+        Returns a numpy.ndarray of amounts due at each point of self.timeline.
+
+        :param coupon_rate: a different coupon rate from self.coupon_rate, might be handy when valuing asset swaps
         """
-        coupon_amount = (
-            self.coupon_amount
+        return (
+            self.amounts
             if coupon_rate is None
             else self.notional * coupon_rate * self.coupon_interval
+            + self.notional_amounts
+        )
+
+    def get_cashflows(self, times, coupon_rate=None):
+        """
+        Returns amounts due at 'times', zero for times that are not on self.timeline.
+
+        :param times: a float value or a numpy.ndarray of future times in years
+        :param coupon_rate: a different coupon rate from self.coupon_rate, might be handy when valuing asset swaps
+        """
+        times = np.asarray(times, dtype=np.float64)
+        idx = np.minimum(np.searchsorted(self.timeline, times), len(self.timeline) - 1)
+        return np.where(
+            self.timeline[idx] == times, self.get_amounts(coupon_rate)[idx], 0.0
         )
-        if t in self.timeline:
-            return coupon_amount + (self.notional if t == self.T else 0)
-        else:
-            return 0
+
+    def cashflow(self, t, coupon_rate=None):
+        """
+        :param t: future time in years
+        :param coupon_rates: a different coupon rate from self.coupon_rate, might be handy when valuing asset swaps
+        """
+        return self.get_cashflows(t, coupon_rate).tolist()
+
+    @staticmethod
+    def get_discount_factors(times, discount_rate, t0=0):
+        """
+        Returns discount factors for cashflows due at 'times' as seen at 't0'.
+
+        :param times: a numpy.ndarray of times in years
+        :param discount_rate: a continuously compounded discount rate, a numpy.ndarray of such rates
+                              or a :class:`~pricing.curves.YieldCurve` object, whose starting date is time zero
+        :param t0: time in years relative to which the discount factors are calculated
+        :returns: a numpy.ndarray of shape (len(times),) for a single discount rate or a YieldCurve object
+                  and of shape discount_rate.shape + (len(times),) for an array of discount rates
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if isinstance(discount_rate, YieldCurve):
+            discount_factors = discount_rate.get_discount_factors_for_maturity_dates(
+                discount_rate.to_maturity_dates(times)
+            )
+            if t0 > 0:
+                # The curve is only looked up at t0 past time zero, its starting date can lie before its first knot
+                t0_dates = discount_rate.to_maturity_dates(np.array([t0]))
+                discount_factors /= (
+                    discount_rate.get_discount_factors_for_maturity_dates(t0_dates)[0]
+                )
+            return discount_factors
+        return np.exp(-np.multiply.outer(discount_rate, times - t0))
 
     def pv_cashflows_from_time(self, start_time, discount_rate):
         """
         Calculate the value of cashflows past 'start_time' as seen at 'start_time'
+
+        :param discount_rate: see get_discount_factors
+        :returns: a float value or a numpy.ndarray of values for an array of discount rates
         """
-        start = (
-            start_time
-            if start_time in self.timeline
-            else self.timeline[self.timeline.searchsorted(start_time)]
+        start = self.timeline.searchsorted(start_time)
+        return (
+            self.get_discount_factors(
+                self.timeline[start:], discount_rate, t0=start_time
+            )
+            @ self.amounts[start:]
         )
-        timeline = np.arange(start, self.T + self.coupon_interval, self.coupon_interval)
-        return self.pv_cashflows(timeline, discount_rate, t0=start_time)
 
     def pv_cashflows(self, timeline, discount_rate, t0=0):
-        return sum(
-            map(lambda t: self.cashflow(t) * exp(-discount_rate * (t - t0)), timeline)
+        """
+        Calculate the value of cashflows due at times in 'timeline' as seen at 't0'
+
+        :param discount_rate: see get_discount_factors
+        :returns: a float value or a numpy.ndarray of values for an array of discount rates
+        """
+        return self.get_discount_factors(
+            timeline, discount_rate, t0
+        ) @ self.get_cashflows(timeline)
+
+    def pv_all_cashflows(self, discount_rate, t0=0):
+        """
+        Calculate the value of all cashflows as seen at 't0'
+
+        :param discount_rate: see get_discount_factors
+        :returns: a float value or a numpy.ndarray of values for an array of discount rates
+        """
+        return (
+            self.get_discount_factors(self.timeline, discount_rate, t0) @ self.amounts
         )
 
-    def pv_all_cashflow(self, discount_rate, t0=0):
-        return self.pv_cashflows(self.timeline, discount_rate, t0)
+    def get_risk_measures(self, discount_rate):
+        """
+        Returns the present value, Macaulay and modified durations, convexity and DV01 of this schedule
+        calculated in closed form, see :meth:`~pricing.bonds.BondPortfolio.get_risk_measures`.
+
+        :param discount_rate: a continuously compounded discount rate or a YieldCurve object
+        :returns: a pandas.Series indexed by names of the risk measures
+        """
+        return (
+            BondPortfolio.from_cashflow_descriptors([self])
+            .get_risk_measures(discount_rate)
+            .iloc[0]
+        )
+
+    def get_key_rate_dv01s(self, discount_rate, nodes=DEFAULT_NODES):
+        """
+        Returns key rate DV01s of this schedule calculated in closed form, see
+        :meth:`~pricing.bonds.BondPortfolio.get_key_rate_dv01s`.
+
+        :param discount_rate: a continuously compounded discount rate or a YieldCurve object
+        :param nodes: a list or a numpy.ndarray of maturities in years in increasing order
+        :returns: a pandas.Series indexed by 'nodes'
+        """
+        return (
+            BondPortfolio.from_cashflow_descriptors([self])
+            .get_key_rate_dv01s(discount_rate, nodes)
+            .iloc[0]
+        )
 
     # Special method needed to value the floating leg of asset swaps
     def pv_all_cashflows_with_other_coupon_rate(
         self, other_coupon_rate, discount_rate, t0=0
     ):
-        return sum(
-            map(
-                lambda t: self.cashflow(t, other_coupon_rate)
-                * exp(-discount_rate * (t - t0)),
-                self.timeline,
-            )
-        )
+        return self.get_discount_factors(
+            self.timeline, discount_rate, t0
+        ) @ self.get_amounts(other_coupon_rate)
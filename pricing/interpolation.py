@@ -0,0 +1,317 @@
+from enum import Enum, unique
+from timeit import timeit
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import CubicSpline, PchipInterpolator, PPoly, splrep
+
+from pricing.conventions import from_continuous_compounding, to_continuous_compounding
+
+
+@unique
+class InterpolationMethod(Enum):
+    """
+    Interpolation methods supported by the :class:`~pricing.curves.YieldCurve` class. See
+    <a href="http://web.math.ku.dk/~rolf/HaganWest.pdf">this article</a> for a discussion of their properties.
+    """
+
+    SPLINE = 0
+    """
+    Spline of configurable degree fitted by FITPACK (scipy.interpolate.splrep, the same spline as
+    scipy.interpolate.InterpolatedUnivariateSpline) precompiled into a piecewise polynomial
+    """
+
+    CUBIC = 1
+    """
+    Cubic spline on yields with not-a-knot end conditions, the same curve as SPLINE of degree 3
+    precompiled into a piecewise polynomial
+    """
+
+    LINEAR = 2
+    """
+    Linear interpolation on yields
+    """
+
+    LOG_LINEAR_DISCOUNT = 3
+    """
+    Linear interpolation on logarithms of discount factors, i.e. piecewise constant forward rates
+    """
+
+    PCHIP = 4
+    """
+    Monotone piecewise cubic Hermite interpolation on yields
+    """
+
+    MONOTONE_CONVEX = 5
+    """
+    Hagan-West monotone convex interpolation of forward rates
+    """
+
+
+class PiecewisePolynomial:
+    """
+    A piecewise polynomial compiled into plain arrays of breakpoints and coefficients, evaluated with
+    a binary search for the interval and Horner's rule. Values beyond the first and the last breakpoint are
+    extrapolated with the polynomials of the first and the last interval respectively.
+    """
+
+    __slots__ = ("breakpoints", "coefficients")
+
+    def __init__(self, breakpoints, coefficients):
+        """
+        :param breakpoints: a numpy.ndarray of n increasing breakpoints
+        :param coefficients: a numpy.ndarray of shape (n-1, degree+1) holding polynomial coefficients
+                             in the variable 'x - breakpoints[i]' for each interval i, the highest power first
+        """
+        assert len(breakpoints) == len(coefficients) + 1 >= 2
+        self.breakpoints = np.ascontiguousarray(breakpoints, dtype=np.float64)
+        self.coefficients = np.ascontiguousarray(coefficients, dtype=np.float64)
+
+    @classmethod
+    def from_spline(cls, tck):
+        """
+        Compiles a B-spline into a piecewise polynomial whose breakpoints are the distinct knots of the spline.
+
+        :param tck: a tuple of knots, B-spline coefficients and the degree as returned by scipy.interpolate.splrep
+        """
+        ppoly = PPoly.from_spline(tck)
+        # Repeated boundary knots of the B-spline yield empty intervals
+        non_empty = np.diff(ppoly.x) > 0
+        return cls(
+            np.append(ppoly.x[:-1][non_empty], ppoly.x[1:][non_empty][-1]),
+            ppoly.c[:, non_empty].T,
+        )
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes used by the arrays of this piecewise polynomial
+        """
+        return self.breakpoints.nbytes + self.coefficients.nbytes
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        intervals = np.clip(
+            np.searchsorted(self.breakpoints, x, side="right") - 1,
+            0,
+            len(self.coefficients) - 1,
+        )
+        dx = x - self.breakpoints[intervals]
+        ret = self.coefficients[intervals, 0]
+        for power in range(1, self.coefficients.shape[1]):
+            ret = ret * dx + self.coefficients[intervals, power]
+        return ret
+
+
+class RateTimesTimeInterpolant:
+    """
+    Yields obtained from a piecewise polynomial interpolating continuously compounded yields multiplied by time,
+    i.e. the negated logarithms of discount factors. Time is measured from the reference point 'x_ref' in the
+    units of the interpolated variable, which cancel out when dividing by time.
+    """
+
+    __slots__ = ("poly", "x_ref", "rate_at_ref", "comp_freq")
+
+    def __init__(self, poly, x_ref, rate_at_ref, compounding_freq):
+        """
+        :param poly: a PiecewisePolynomial of continuously compounded yields multiplied by 'x - x_ref'
+        :param x_ref: the point where time is zero, i.e. the starting date of the curve
+        :param rate_at_ref: the yield to return at 'x_ref'
+        :param compounding_freq: how many times a year is the interest of returned yields compounded,
+                                 0 implies continuous compounding
+        """
+        self.poly = poly
+        self.x_ref = x_ref
+        self.rate_at_ref = rate_at_ref
+        self.comp_freq = compounding_freq
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes used by the arrays of the underlying piecewise polynomial
+        """
+        return self.poly.nbytes
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        time = x - self.x_ref
+        at_ref = time == 0
+        rate = from_continuous_compounding(
+            self.poly(x) / np.where(at_ref, 1.0, time), self.comp_freq
+        )
+        return np.where(at_ref, self.rate_at_ref, rate)
+
+
+def build_interpolant(method, x, y, k=3, x_ref=None, compounding_freq=2):
+    """
+    Returns a callable interpolating yields 'y' given at points 'x', calling it with a float value returns
+    a 0-dimensional numpy.ndarray and with a numpy.ndarray returns a numpy.ndarray.
+
+    :param method: an instance of the InterpolationMethod enum
+    :param x: a numpy.ndarray of increasing points, e.g. POSIX timestamps
+    :param y: a numpy.ndarray of yields corresponding to 'x'
+    :param k: degree of the smoothing spline, used only by InterpolationMethod.SPLINE
+    :param x_ref: the point where time is zero (the starting date of the curve) required by methods interpolating
+                  discount factors or forward rates, must not be greater than x[0]
+    :param compounding_freq: how many times a year is the interest of 'y' compounded, 0 implies continuous
+                             compounding, used only by methods interpolating discount factors or forward rates
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    assert len(x) == len(y) >= 2
+
+    if method == InterpolationMethod.SPLINE:
+        return PiecewisePolynomial.from_spline(splrep(x, y, k=k, s=0))
+    elif method == InterpolationMethod.CUBIC:
+        spline = CubicSpline(x, y, bc_type="not-a-knot" if len(x) > 2 else "natural")
+        return PiecewisePolynomial(spline.x, spline.c.T)
+    elif method == InterpolationMethod.PCHIP:
+        spline = PchipInterpolator(x, y)
+        return PiecewisePolynomial(spline.x, spline.c.T)
+    elif method == InterpolationMethod.LINEAR:
+        return PiecewisePolynomial(
+            x, np.column_stack([np.diff(y) / np.diff(x), y[:-1]])
+        )
+
+    # The remaining methods interpolate continuously compounded yields multiplied by time
+    assert x_ref is not None and x_ref <= x[0]
+    rates = to_continuous_compounding(y, compounding_freq)
+    rate_at_ref = y[0] if x[0] == x_ref else np.nan
+    if x[0] == x_ref:
+        x, rates = x[1:], rates[1:]
+    times = np.concatenate([[0.0], x - x_ref])
+    rates_times_times = np.concatenate([[0.0], rates * (x - x_ref)])
+
+    if method == InterpolationMethod.LOG_LINEAR_DISCOUNT:
+        poly = PiecewisePolynomial(
+            times + x_ref,
+            np.column_stack(
+                [np.diff(rates_times_times) / np.diff(times), rates_times_times[:-1]]
+            ),
+        )
+    elif method == InterpolationMethod.MONOTONE_CONVEX:
+        poly = build_monotone_convex(times, rates_times_times)
+        poly.breakpoints += x_ref
+    else:
+        raise ValueError("Unsupported interpolation method: %s" % method)
+
+    if np.isnan(rate_at_ref):
+        # The limit of yields at time zero is the instantaneous forward rate at that time
+        rate_at_ref = from_continuous_compounding(
+            poly.coefficients[0, -2], compounding_freq
+        )
+    return RateTimesTimeInterpolant(poly, x_ref, rate_at_ref, compounding_freq)
+
+
+def build_monotone_convex(times, rates_times_times):
+    """
+    Returns a PiecewisePolynomial of continuously compounded yields multiplied by time according to the monotone
+    convex method of Hagan and West. Instantaneous forward rates are piecewise quadratic, hence yields multiplied
+    by time are piecewise cubic with up to two pieces per interval between the input points.
+
+    :param times: a numpy.ndarray of increasing times starting with 0
+    :param rates_times_times: a numpy.ndarray of continuously compounded yields multiplied by 'times'
+    """
+    n = len(times) - 1
+    intervals = np.diff(times)
+    discrete_forwards = np.diff(rates_times_times) / intervals
+
+    # Instantaneous forward rates at the input points
+    forwards = np.empty(n + 1)
+    forwards[1:n] = (
+        intervals[:-1] * discrete_forwards[1:] + intervals[1:] * discrete_forwards[:-1]
+    ) / (intervals[:-1] + intervals[1:])
+    forwards[0] = discrete_forwards[0] - 0.5 * (
+        (forwards[1] if n > 1 else discrete_forwards[0]) - discrete_forwards[0]
+    )
+    forwards[n] = discrete_forwards[-1] - 0.5 * (
+        (forwards[n - 1] if n > 1 else discrete_forwards[-1]) - discrete_forwards[-1]
+    )
+
+    breakpoints = []
+    coefficients = []
+    for i in range(n):
+        g0 = forwards[i] - discrete_forwards[i]
+        g1 = forwards[i + 1] - discrete_forwards[i]
+
+        # Pieces of g(x) on [0; 1] as (start, a, b, c) with g = a*u^2 + b*u + c and u = x - start
+        if g0 == 0 and g1 == 0:
+            pieces = [(0.0, 0.0, 0.0, 0.0)]
+        elif (g0 < 0 and -0.5 * g0 <= g1 <= -2 * g0) or (
+            g0 > 0 and -0.5 * g0 >= g1 >= -2 * g0
+        ):
+            pieces = [(0.0, 3 * (g0 + g1), -(4 * g0 + 2 * g1), g0)]
+        elif (g0 < 0 and g1 > -2 * g0) or (g0 > 0 and g1 < -2 * g0):
+            eta = (g1 + 2 * g0) / (g1 - g0)
+            pieces = [(0.0, 0.0, 0.0, g0), (eta, (g1 - g0) / (1 - eta) ** 2, 0.0, g0)]
+        elif (g0 > 0 and 0 > g1 > -0.5 * g0) or (g0 < 0 and 0 < g1 < -0.5 * g0):
+            eta = 3 * g1 / (g1 - g0)
+            a = (g0 - g1) / eta**2
+            pieces = [(0.0, a, -2 * a * eta, g0), (eta, 0.0, 0.0, g1)]
+        else:
+            eta = g1 / (g1 + g0)
+            mean = -g0 * g1 / (g0 + g1)
+            a = (g0 - mean) / eta**2
+            pieces = [
+                (0.0, a, -2 * a * eta, g0),
+                (eta, (g1 - mean) / (1 - eta) ** 2, 0.0, mean),
+            ]
+
+        # Convert to forwards in local time 's' and integrate into yields multiplied by time
+        value = rates_times_times[i]
+        for j, (start, a, b, c) in enumerate(pieces):
+            end = pieces[j + 1][0] if j + 1 < len(pieces) else 1.0
+            if end <= start:
+                continue
+            a, b, c = a / intervals[i] ** 2, b / intervals[i], c + discrete_forwards[i]
+            breakpoints.append(times[i] + start * intervals[i])
+            coefficients.append([a / 3, b / 2, c, value])
+            length = (end - start) * intervals[i]
+            value += ((a / 3 * length + b / 2) * length + c) * length
+    breakpoints.append(times[-1])
+    return PiecewisePolynomial(np.array(breakpoints), np.array(coefficients))
+
+
+def run_benchmark(num_points=100_000, repeat=20):
+    """
+    Compares the fit time and evaluation throughput of all interpolation methods on a typical US Treasury
+    yield curve.
+
+    :param num_points: the number of points each evaluation is performed on
+    :param repeat: how many times to repeat each measurement
+    :returns: a pandas.DataFrame indexed by interpolation method names
+    """
+    seconds_per_year = 365.25 * 24 * 60 * 60
+    maturities = np.array([0, 1 / 12, 0.25, 0.5, 1, 2, 3, 5, 7, 10, 20, 30])
+    x = maturities * seconds_per_year
+    y = np.array([5.33, 5.5, 5.45, 5.3, 5.0, 4.6, 4.4, 4.2, 4.2, 4.25, 4.5, 4.4]) / 100
+    points = np.linspace(x[0], x[-1], num_points)
+
+    results = {}
+    for method in InterpolationMethod:
+        fit_time = (
+            timeit(lambda: build_interpolant(method, x, y, x_ref=0.0), number=repeat)
+            / repeat
+        )
+        interpolant = build_interpolant(method, x, y, x_ref=0.0)
+        eval_time = timeit(lambda: interpolant(points), number=repeat) / repeat
+        scalar_eval_time = timeit(lambda: interpolant(x[5]), number=repeat) / repeat
+        results[method.name] = (
+            fit_time * 1e6,
+            scalar_eval_time * 1e6,
+            num_points / eval_time,
+        )
+    return pd.DataFrame.from_dict(
+        results,
+        orient="index",
+        columns=[
+            "Fit time (us)",
+            "Single point evaluation time (us)",
+            "Evaluations per second",
+        ],
+    )
+
+
+if __name__ == "__main__":
+    pd.options.display.float_format = "{:,.1f}".format
+    print(run_benchmark())
@@ -0,0 +1,210 @@
+import os
+from abc import ABC, abstractmethod
+
+import pandas as pd
+import pandas_datareader.data as web
+
+FILE_FORMATS = (".parquet", ".feather", ".csv")
+"""
+Extensions of the file formats local stores can be persisted in
+"""
+
+
+def get_file_format(path):
+    """
+    Returns the extension of 'path' in lower case, raises ValueError unless it is one of FILE_FORMATS
+    """
+    file_format = os.path.splitext(path)[1].lower()
+    if file_format not in FILE_FORMATS:
+        raise ValueError("Unsupported store format: %s" % path)
+    return file_format
+
+
+def read_frame(path):
+    """
+    Reads a pandas.DataFrame from a Parquet, Feather or CSV file written by save_frame, the first column of
+    the file becomes the index.
+    """
+    file_format = get_file_format(path)
+    if file_format == ".parquet":
+        frame = pd.read_parquet(path)
+    elif file_format == ".feather":
+        frame = pd.read_feather(path)
+    else:
+        frame = pd.read_csv(path)
+    return frame.set_index(frame.columns[0])
+
+
+def save_frame(frame, path):
+    """
+    Saves 'frame' to a Parquet, Feather or CSV file depending on the extension of 'path', the index is stored
+    as the first column. The file is replaced atomically so that readers never observe a partially written file.
+    """
+    file_format = get_file_format(path)
+    frame = frame.reset_index()
+    tmp_path = "%s.%d.tmp%s" % (path[: -len(file_format)], os.getpid(), file_format)
+    if file_format == ".parquet":
+        frame.to_parquet(tmp_path, index=False)
+    elif file_format == ".feather":
+        frame.to_feather(tmp_path)
+    else:
+        frame.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+class PriceProvider(ABC):
+    """
+    Base class of sources of daily prices of futures contracts. Prices are represented as a pandas.DataFrame
+    indexed by pandas.DatetimeIndex whose columns are ticker symbols.
+    """
+
+    @abstractmethod
+    def get_prices(self, tickers, start, end):
+        """
+        Returns a pandas.DataFrame of daily prices of 'tickers' for dates in the range [start; end].
+
+        :param tickers: a list of ticker symbols
+        :param start: a datetime.date object or None to return all prices up to 'end'
+        :param end: a datetime.date object
+        """
+        pass
+
+    def get_last_prices(self, tickers, dt, start=None):
+        """
+        Returns a pandas.Series indexed by 'tickers' of the prices from the last day in the range [start; dt]
+        for which prices are available.
+
+        :param tickers: a list of ticker symbols
+        :param dt: a datetime.date object
+        :param start: a datetime.date object or None to consider all prices up to 'dt'
+        """
+        prices = self.get_prices(tickers, start, dt)
+        if prices.empty:
+            raise ValueError("No prices of %s available up to %s" % (tickers, dt))
+        return prices.iloc[-1].reindex(tickers)
+
+
+class YahooPriceProvider(PriceProvider):
+    """
+    Retrieves prices from Yahoo Finance on every request
+    """
+
+    def __init__(self, column="Adj Close"):
+        """
+        :param column: which of the daily prices returned by Yahoo Finance to use
+        """
+        self.column = column
+
+    def get_prices(self, tickers, start, end):
+        prices = web.get_data_yahoo(list(tickers), start, end).loc[:, self.column]
+        return (
+            prices.to_frame(tickers[0]) if isinstance(prices, pd.Series) else prices
+        ).reindex(columns=tickers)
+
+
+class FixturePriceProvider(PriceProvider):
+    """
+    Serves prices held in memory, e.g. fixtures for working offline
+    """
+
+    def __init__(self, prices):
+        """
+        :param prices: a pandas.DataFrame indexed by dates whose columns are ticker symbols
+        """
+        self.prices = self.normalize(prices)
+
+    @staticmethod
+    def normalize(prices):
+        """
+        Returns 'prices' indexed by a sorted pandas.DatetimeIndex without duplicate dates, later rows take precedence
+        """
+        prices = prices.set_axis(pd.DatetimeIndex(prices.index).normalize())
+        prices = prices[~prices.index.duplicated(keep="last")]
+        return prices.sort_index().rename_axis("Date")
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+        Constructs a provider from a CSV file whose first column holds dates and whose remaining columns
+        are ticker symbols.
+        """
+        return cls(pd.read_csv(path, index_col=0, parse_dates=True))
+
+    def get_prices(self, tickers, start, end):
+        return self.prices.loc[
+            None if start is None else pd.Timestamp(start) : pd.Timestamp(end)
+        ].reindex(columns=tickers)
+
+
+class LocalPriceStore(FixturePriceProvider):
+    """
+    Prices persisted in a local columnar file (Parquet or Feather, CSV is supported as well), loaded in memory
+    at once so that lookups for individual dates don't require any I/O. The store is populated in bulk from
+    another provider for a whole range of dates.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: path to a file with the '.parquet', '.feather' or '.csv' extension, it is created
+                     on the first call to update if it doesn't exist
+        """
+        self.path = path
+        self.file_format = get_file_format(path)
+        super().__init__(
+            self.read() if os.path.exists(path) else pd.DataFrame(dtype="float64")
+        )
+
+    def read(self):
+        return read_frame(self.path)
+
+    def save(self):
+        save_frame(self.prices, self.path)
+
+    def update(self, provider, tickers, start, end):
+        """
+        Retrieves prices of 'tickers' for the range of dates [start; end] from 'provider' in a single request,
+        merges them into this store and saves it. Prices retrieved take precedence over the stored ones
+        unless they are missing.
+
+        :param provider: a PriceProvider object, e.g. a YahooPriceProvider
+        :param tickers: a list of ticker symbols
+        :param start: a datetime.date object
+        :param end: a datetime.date object
+        """
+        return self.merge(provider.get_prices(tickers, start, end))
+
+    def merge(self, prices):
+        """
+        Merges 'prices' into this store and saves it. Prices merged take precedence over the stored ones
+        unless they are missing.
+
+        :param prices: a pandas.DataFrame indexed by dates whose columns are ticker symbols
+        """
+        prices = self.normalize(prices)
+        self.prices = self.normalize(
+            pd.concat([self.prices, prices]).groupby(level=0).last()
+            if not self.prices.empty
+            else prices
+        )
+        self.save()
+        return self
+
+
+class RecordingPriceProvider(PriceProvider):
+    """
+    Passes requests through to another provider and records every price it returns into a LocalPriceStore,
+    which can then serve the same requests offline.
+    """
+
+    def __init__(self, provider, store):
+        """
+        :param provider: a PriceProvider object to retrieve prices from, e.g. a YahooPriceProvider
+        :param store: a LocalPriceStore object to record prices into
+        """
+        self.provider = provider
+        self.store = store
+
+    def get_prices(self, tickers, start, end):
+        prices = self.provider.get_prices(tickers, start, end)
+        self.store.merge(prices)
+        return prices
@@ -0,0 +1,224 @@
+import os
+import threading
+from enum import Enum, unique
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from pricing.price_providers import (
+    LocalPriceStore,
+    RecordingPriceProvider,
+    YahooPriceProvider,
+)
+from pricing.series_providers import (
+    FredSeriesCache,
+    RecordingSeriesProvider,
+    SeriesArchive,
+)
+
+MODE_VARIABLE = "ECONOMIC_ANALYSIS_MODE"
+"""
+The environment variable selecting a member of the Mode enum by its value, 'live' if it isn't set
+"""
+
+ARCHIVE_VARIABLE = "ECONOMIC_ANALYSIS_ARCHIVE"
+"""
+The environment variable specifying the directory of the archive series and prices are recorded into and replayed
+from, DEFAULT_ARCHIVE_PATH if it isn't set
+"""
+
+DEFAULT_ARCHIVE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "economic_analysis", "archive"
+)
+"""
+The directory series and prices are recorded into and replayed from by default
+"""
+
+
+@unique
+class Mode(Enum):
+    """
+    How scripts and pricing classes obtain series and prices
+    """
+
+    LIVE = "live"
+    """
+    Series are retrieved from FRED through the local cache and prices from Yahoo Finance
+    """
+
+    RECORD = "record"
+    """
+    Series and prices are retrieved as in LIVE mode, every request is recorded into the archive as well
+    """
+
+    REPLAY = "replay"
+    """
+    Series and prices are served from the archive without any access to the network
+    """
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Returns the mode selected by the MODE_VARIABLE environment variable
+        """
+        value = os.environ.get(MODE_VARIABLE, cls.LIVE.value).lower()
+        try:
+            return cls(value)
+        except ValueError:
+            raise ValueError("Unsupported mode in %s: %s" % (MODE_VARIABLE, value))
+
+
+def get_archive_path(path=None):
+    """
+    Returns 'path' unless it is None, otherwise the directory specified by the ARCHIVE_VARIABLE environment variable
+    or DEFAULT_ARCHIVE_PATH
+    """
+    return (
+        os.environ.get(ARCHIVE_VARIABLE, DEFAULT_ARCHIVE_PATH) if path is None else path
+    )
+
+
+def get_series_archive(path=None, file_format=".parquet"):
+    """
+    Returns the SeriesArchive kept in the 'series' subdirectory of the archive in 'path', see get_archive_path
+    """
+    return SeriesArchive(os.path.join(get_archive_path(path), "series"), file_format)
+
+
+def get_price_store(path=None, file_format=".parquet"):
+    """
+    Returns the LocalPriceStore kept in the 'prices' file of the archive in 'path', see get_archive_path
+    """
+    return LocalPriceStore(os.path.join(get_archive_path(path), "prices" + file_format))
+
+
+def get_series_provider(mode=None, path=None, file_format=".parquet"):
+    """
+    Returns a SeriesProvider object to retrieve series from in 'mode'. Scripts obtain series this way so that
+    the same code runs against FRED through the local FredSeriesCache, records everything it retrieves into
+    the archive or replays it offline, depending on the MODE_VARIABLE environment variable.
+
+    :param mode: a member of the Mode enum, if None it is selected by the MODE_VARIABLE environment variable
+    :param path: the directory of the archive, see get_archive_path
+    :param file_format: the extension of the format series are archived in, '.parquet', '.feather' or '.csv'
+    """
+    mode = Mode.from_environment() if mode is None else mode
+    if mode == Mode.LIVE:
+        return FredSeriesCache()
+    elif mode == Mode.RECORD:
+        return RecordingSeriesProvider(
+            FredSeriesCache(), get_series_archive(path, file_format)
+        )
+    elif mode == Mode.REPLAY:
+        return get_series_archive(path, file_format)
+    raise ValueError("Unsupported mode: %s" % mode)
+
+
+def get_price_provider(mode=None, path=None, file_format=".parquet"):
+    """
+    Returns a PriceProvider object to retrieve prices of futures contracts from in 'mode'.
+
+    :param mode: a member of the Mode enum, if None it is selected by the MODE_VARIABLE environment variable
+    :param path: the directory of the archive, see get_archive_path
+    :param file_format: the extension of the format prices are archived in, '.parquet', '.feather' or '.csv'
+    """
+    mode = Mode.from_environment() if mode is None else mode
+    if mode == Mode.LIVE:
+        return YahooPriceProvider()
+    elif mode == Mode.RECORD:
+        return RecordingPriceProvider(
+            YahooPriceProvider(), get_price_store(path, file_format)
+        )
+    elif mode == Mode.REPLAY:
+        return get_price_store(path, file_format)
+    raise ValueError("Unsupported mode: %s" % mode)
+
+
+class FredRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves observations of series from the SeriesArchive of the server as CSV files in the format of FRED's
+    '/graph/fredgraph.csv' endpoint, missing observations are represented by '.'
+    """
+
+    # Keeps connections open across requests like FRED does
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if not url.path.endswith("/graph/fredgraph.csv") or "id" not in query:
+            return self.send_body(404, b"Not found")
+        series_id = query["id"][0]
+        try:
+            observations = self.server.archive.get_series(
+                series_id, query.get("cosd", [None])[0], query.get("coed", [None])[0]
+            )
+        except ValueError as e:
+            return self.send_body(404, str(e).encode())
+        body = observations.rename_axis("observation_date").to_csv(
+            na_rep=".", date_format="%Y-%m-%d"
+        )
+        self.send_body(200, body.encode(), "text/csv")
+
+    def send_body(self, status, body, content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """
+    A local stand-in for FRED serving series recorded into a SeriesArchive over HTTP. Pointing a FredSeriesProvider
+    to 'url' runs it, including its concurrent requests over reused connections, without any access to
+    the network. Prices are replayed in-process by the LocalPriceStore of the archive instead, as Yahoo Finance
+    is accessed through pandas_datareader, which can't be pointed to another server.
+    """
+
+    def __init__(self, archive, host="127.0.0.1", port=0):
+        """
+        :param archive: a SeriesArchive object to serve series from
+        :param host: the address to listen on
+        :param port: the port to listen on, 0 selects any free port
+        """
+        self.archive = archive
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        """
+        The base URL to construct a FredSeriesProvider with, available once the server is started
+        """
+        assert self.server is not None
+        return "http://%s:%d" % self.server.server_address[:2]
+
+    def start(self):
+        """
+        Starts serving requests in a background thread, each connection is handled by a thread of its own
+        """
+        self.server = ThreadingHTTPServer((self.host, self.port), FredRequestHandler)
+        self.server.daemon_threads = True
+        self.server.archive = self.archive
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+            self.server = None
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
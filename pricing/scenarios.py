@@ -0,0 +1,287 @@
+import numpy as np
+
+from pricing.curves import YieldCurve
+
+# Maturities in years at which scenario shifts are defined by default, the usual key rate tenors
+DEFAULT_NODES = (0.0, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 20.0, 30.0)
+
+
+def get_interpolation_intervals(nodes, years):
+    """
+    Returns a tuple of numpy.ndarray objects holding the indices i of intervals [nodes[i]; nodes[i + 1]] 'years'
+    fall in and the relative positions of 'years' within them, positions beyond the first and the last node
+    are clipped to 0 and 1 respectively.
+
+    :param nodes: a numpy.ndarray of maturities in years in increasing order
+    :param years: a numpy.ndarray of maturities in years
+    """
+    intervals = np.clip(
+        np.searchsorted(nodes, years, side="right") - 1, 0, len(nodes) - 2
+    )
+    fractions = np.clip(
+        (years - nodes[intervals]) / (nodes[intervals + 1] - nodes[intervals]), 0.0, 1.0
+    )
+    return intervals, fractions
+
+
+def get_interpolation_weights(nodes, years):
+    """
+    Returns a matrix of linear interpolation weights such that 'node_values @ weights' interpolates values given
+    at 'nodes' onto 'years', values beyond the first and the last node are extrapolated flat.
+
+    :param nodes: a numpy.ndarray of maturities in years in increasing order
+    :param years: a numpy.ndarray of maturities in years
+    :returns: a numpy.ndarray of shape (len(nodes), len(years))
+    """
+    intervals, fractions = get_interpolation_intervals(nodes, years)
+    weights = np.zeros((len(nodes), len(years)))
+    columns = np.arange(len(years))
+    weights[intervals, columns] = 1.0 - fractions
+    weights[intervals + 1, columns] += fractions
+    return weights
+
+
+class ShockedYieldCurve:
+    """
+    A yield curve represented as a base :class:`~pricing.curves.YieldCurve` plus an additive shift of its yields.
+    The shift is defined at a set of node maturities and linearly interpolated in between, it is applied
+    lazily when the curve is queried, hence no spline needs to be refitted.
+    """
+
+    def __init__(self, base_curve, nodes, node_shifts):
+        """
+        :param base_curve: a YieldCurve object to be shocked
+        :param nodes: a list or a numpy.ndarray of maturities in years in increasing order
+        :param node_shifts: a list or a numpy.ndarray of shifts in basis points corresponding to 'nodes'
+        """
+        assert len(nodes) == len(node_shifts) >= 2
+        self.base_curve = base_curve
+        self.nodes = np.asarray(nodes, dtype=np.float64)
+        self.node_shifts = np.asarray(node_shifts, dtype=np.float64)
+
+    def get_shifts_for_maturities(self, years):
+        """
+        Returns the yield shifts as decimal fractions for maturities expressed in years.
+
+        :param years: a float value or a numpy.ndarray of maturities in years
+        """
+        return np.interp(years, self.nodes, self.node_shifts) * 1e-4
+
+    def get_yield_for_maturity_date(self, dt):
+        """
+        Returns the shocked annual yield for maturity corresponding to 'dt', see
+        :meth:`~pricing.curves.YieldCurve.get_yield_for_maturity_date`.
+
+        :param dt: a datetime.date object for which the yield needs to be calculated
+        """
+        return self.get_yields_for_maturity_dates([dt])[0].tolist()
+
+    def get_yields_for_maturity_dates(self, dts):
+        """
+        Returns the shocked annual yields for maturities corresponding to 'dts', see
+        :meth:`~pricing.curves.YieldCurve.get_yields_for_maturity_dates`.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date
+                    objects for which the yields need to be calculated
+        """
+        yields, years = get_base_yields_and_years(self.base_curve, dts)
+        return yields + self.get_shifts_for_maturities(years)
+
+    def get_discount_factors_for_maturity_dates(self, dts):
+        """
+        Returns the shocked discount factors for maturities corresponding to 'dts', see
+        :meth:`~pricing.curves.YieldCurve.get_discount_factors_for_maturity_dates`.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date
+                    objects for which the discount factors need to be calculated
+        """
+        yields, years = get_base_yields_and_years(self.base_curve, dts)
+        ytm = self.base_curve.to_continuous_compounding(
+            yields + self.get_shifts_for_maturities(years)
+        )
+        return np.exp(-ytm * years)
+
+
+class ScenarioSet:
+    """
+    A set of scenarios applied to the same base :class:`~pricing.curves.YieldCurve`. Every scenario is an additive
+    shift of yields defined at common node maturities (by default the usual key rate tenors) and linearly
+    interpolated in between. Scenarios are stored as rows of a matrix so that all of them are evaluated at once.
+    """
+
+    def __init__(self, base_curve, nodes=DEFAULT_NODES):
+        """
+        :param base_curve: a YieldCurve object the scenarios apply to
+        :param nodes: a list or a numpy.ndarray of maturities in years in increasing order at which scenario
+                      shifts are defined
+        """
+        assert len(nodes) >= 2
+        self.base_curve = base_curve
+        self.nodes = np.asarray(nodes, dtype=np.float64)
+        assert np.all(np.diff(self.nodes) > 0)
+        self.names = []
+        self.node_shifts = np.empty((0, len(self.nodes)))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        """
+        Returns the i-th scenario as a ShockedYieldCurve object
+        """
+        return ShockedYieldCurve(self.base_curve, self.nodes, self.node_shifts[i])
+
+    def add_scenarios(self, names, node_shifts):
+        """
+        Adds scenarios defined by their shifts at the nodes of this set.
+
+        :param names: a list of scenario names
+        :param node_shifts: a numpy.ndarray of shape (len(names), len(self.nodes)) of shifts in basis points
+        """
+        node_shifts = np.asarray(node_shifts, dtype=np.float64).reshape(
+            len(names), len(self.nodes)
+        )
+        self.names.extend(names)
+        self.node_shifts = np.concatenate([self.node_shifts, node_shifts])
+        return self
+
+    def add_parallel_shifts(self, basis_points):
+        """
+        Adds a scenario shifting all yields by the same amount for each value in 'basis_points'.
+
+        :param basis_points: a list of shifts in basis points
+        """
+        return self.add_scenarios(
+            ["Parallel %+gbp" % bp for bp in basis_points],
+            np.repeat(
+                np.asarray(basis_points, dtype=np.float64)[:, np.newaxis],
+                len(self.nodes),
+                axis=1,
+            ),
+        )
+
+    def add_twist(self, short_bp, long_bp, short_maturity=2.0, long_maturity=10.0):
+        """
+        Adds a scenario shifting yields by 'short_bp' up to 'short_maturity' and by 'long_bp' from 'long_maturity'
+        onwards, shifts in between change linearly with maturity.
+
+        :param short_bp: a shift in basis points of short term yields
+        :param long_bp: a shift in basis points of long term yields
+        :param short_maturity: a maturity in years where the short end of the twist is anchored
+        :param long_maturity: a maturity in years where the long end of the twist is anchored
+        """
+        return self.add_scenarios(
+            ["Twist %+gbp/%+gbp" % (short_bp, long_bp)],
+            np.interp(self.nodes, [short_maturity, long_maturity], [short_bp, long_bp]),
+        )
+
+    def add_butterfly(
+        self,
+        wings_bp,
+        belly_bp,
+        short_maturity=2.0,
+        belly_maturity=5.0,
+        long_maturity=10.0,
+    ):
+        """
+        Adds a scenario shifting the wings of the curve by 'wings_bp' and its belly by 'belly_bp', shifts
+        in between change linearly with maturity.
+
+        :param wings_bp: a shift in basis points of yields up to 'short_maturity' and from 'long_maturity' onwards
+        :param belly_bp: a shift in basis points of the yield for 'belly_maturity'
+        """
+        return self.add_scenarios(
+            ["Butterfly %+gbp/%+gbp" % (wings_bp, belly_bp)],
+            np.interp(
+                self.nodes,
+                [short_maturity, belly_maturity, long_maturity],
+                [wings_bp, belly_bp, wings_bp],
+            ),
+        )
+
+    def add_key_rate_shifts(self, basis_points=1.0):
+        """
+        Adds a scenario per node of this set shifting the yield at that node only, shifts of yields
+        at neighbouring maturities decrease linearly to zero at the adjacent nodes.
+
+        :param basis_points: a shift in basis points at the bumped node
+        """
+        return self.add_scenarios(
+            ["Key rate %gy %+gbp" % (node, basis_points) for node in self.nodes],
+            np.eye(len(self.nodes)) * basis_points,
+        )
+
+    def add_historical_shifts(self, changes, maturities=None):
+        """
+        Adds a scenario per row of 'changes', e.g. observed daily changes of a history of yield curves.
+
+        :param changes: a pandas.DataFrame whose rows hold changes of yields in basis points and whose columns are
+                        maturities in years, or a numpy.ndarray with the same layout
+        :param maturities: maturities in years corresponding to the columns of 'changes', if None the columns
+                           of a pandas.DataFrame are used
+        """
+        names = (
+            [str(idx) for idx in changes.index]
+            if hasattr(changes, "index")
+            else ["Historical %d" % i for i in range(len(changes))]
+        )
+        maturities = np.asarray(
+            changes.columns if maturities is None else maturities, dtype=np.float64
+        )
+        changes = np.asarray(changes, dtype=np.float64)
+        return self.add_scenarios(
+            names,
+            changes @ get_interpolation_weights(maturities, self.nodes),
+        )
+
+    def get_yields_for_maturity_dates(self, dts):
+        """
+        Returns the annual yields for maturities corresponding to 'dts' under every scenario of this set.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date
+                    objects for which the yields need to be calculated
+        :returns: a numpy.ndarray of shape (len(self), len(dts))
+        """
+        yields, years = get_base_yields_and_years(self.base_curve, dts)
+        return yields + self.get_shifts_for_maturities(years)
+
+    def get_discount_factors_for_maturity_dates(self, dts):
+        """
+        Returns the discount factors for maturities corresponding to 'dts' under every scenario of this set.
+
+        :param dts: a numpy.ndarray of numpy.datetime64 values, a pandas.DatetimeIndex or a list of datetime.date
+                    objects for which the discount factors need to be calculated
+        :returns: a numpy.ndarray of shape (len(self), len(dts))
+        """
+        yields, years = get_base_yields_and_years(self.base_curve, dts)
+        ytm = self.base_curve.to_continuous_compounding(
+            yields + self.get_shifts_for_maturities(years)
+        )
+        return np.exp(-ytm * years)
+
+    def get_shifts_for_maturities(self, years):
+        """
+        Returns the yield shifts as decimal fractions for maturities expressed in years under every scenario.
+
+        :param years: a numpy.ndarray of maturities in years
+        :returns: a numpy.ndarray of shape (len(self), len(years))
+        """
+        return (
+            self.node_shifts @ get_interpolation_weights(self.nodes, np.asarray(years))
+        ) * 1e-4
+
+
+def get_base_yields_and_years(base_curve, dts):
+    """
+    Returns a tuple of numpy.ndarray objects holding the yields of 'base_curve' for maturities corresponding
+    to 'dts' and these maturities expressed in years relative to the starting date of 'base_curve'.
+    """
+    days = base_curve.align_dates(dts)
+    timestamps = base_curve.to_timestamps(days)
+    assert np.all(
+        (base_curve.timestamps[0] <= timestamps)
+        & (timestamps <= base_curve.timestamps[-1])
+    )
+    return base_curve.ppoly(timestamps), YieldCurve.year_difference(
+        base_curve.date, days
+    )
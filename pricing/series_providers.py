@@ -0,0 +1,525 @@
+import http.client
+import io
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum, unique
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from pricing.price_providers import FILE_FORMATS, read_frame, save_frame
+
+EARLIEST_DATE = date(1700, 1, 1)
+"""
+The start date requested from sources when a full history of a series is requested
+"""
+
+FRED_URL = "https://fred.stlouisfed.org"
+"""
+The base URL of FRED, series are downloaded from its '/graph/fredgraph.csv' endpoint
+"""
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "economic_analysis", "fred"
+)
+"""
+The directory FRED series are cached in by default
+"""
+
+
+@unique
+class Frequency(Enum):
+    """
+    Native frequencies of series, values are typical numbers of days between observations
+    """
+
+    DAILY = 1
+    """
+    Daily observations, possibly on business days only
+    """
+
+    WEEKLY = 7
+    """
+    Weekly observations
+    """
+
+    MONTHLY = 30
+    """
+    Monthly observations
+    """
+
+    QUARTERLY = 91
+    """
+    Quarterly observations
+    """
+
+    ANNUAL = 365
+    """
+    Annual observations
+    """
+
+    @classmethod
+    def infer(cls, index):
+        """
+        Returns the frequency whose spacing is the closest to the median spacing of the dates in 'index',
+        DAILY if there are fewer than two dates.
+
+        :param index: a pandas.DatetimeIndex
+        """
+        if len(index) < 2:
+            return cls.DAILY
+        spacing = np.median(np.diff(index.values).astype("timedelta64[D]").astype(int))
+        return min(cls, key=lambda frequency: abs(np.log(spacing / frequency.value)))
+
+
+DEFAULT_TTLS = {
+    Frequency.DAILY: timedelta(hours=12),
+    Frequency.WEEKLY: timedelta(days=1),
+    Frequency.MONTHLY: timedelta(days=1),
+    Frequency.QUARTERLY: timedelta(days=7),
+    Frequency.ANNUAL: timedelta(days=30),
+}
+"""
+How long cached series of each frequency are considered up to date after being fetched
+"""
+
+
+class SeriesProvider(ABC):
+    """
+    Base class of sources of economic time series such as FRED. Series are represented as a pandas.DataFrame
+    indexed by pandas.DatetimeIndex whose columns are series IDs.
+    """
+
+    @abstractmethod
+    def get_series(self, series_ids, start=None, end=None):
+        """
+        Returns a pandas.DataFrame of observations of 'series_ids' for dates in the range [start; end].
+
+        :param series_ids: a series ID or a list of series IDs
+        :param start: a datetime.date object or None to return full histories
+        :param end: a datetime.date object or None to return observations up to the current date
+        """
+        pass
+
+    def refresh(self, series_ids, start, end):
+        """
+        Prepares observations of 'series_ids' in the range [start; end] for subsequent requests, e.g. by fetching
+        them into a local cache at once. Sources without any local state don't do anything.
+
+        :param series_ids: a list of series IDs
+        :param start: a datetime.date object
+        :param end: a datetime.date object
+        """
+        pass
+
+    def get_series_for_ranges(self, ranges):
+        """
+        Returns observations of series for individual ranges of dates, sources supporting concurrent requests
+        retrieve all of them at once.
+
+        :param ranges: a list of tuples of a series ID, a datetime.date object of the start of the range
+                       and a datetime.date object of its end
+        :returns: a dict mapping series IDs to pandas.Series objects indexed by pandas.DatetimeIndex
+        """
+        return {
+            series_id: self.get_series([series_id], start, end)[series_id]
+            for series_id, start, end in ranges
+        }
+
+
+class FredSeriesProvider(SeriesProvider):
+    """
+    Retrieves series from FRED on every request. Series are downloaded concurrently by a bounded pool of worker
+    threads, each keeping its HTTP connection open across requests. The base URL can point to a local stand-in
+    server.
+    """
+
+    def __init__(self, base_url=FRED_URL, max_workers=8, timeout=30.0):
+        """
+        :param base_url: the scheme and host of the server, optionally followed by a path prefix
+        :param max_workers: the maximum number of concurrent requests
+        :param timeout: the timeout of connecting and reading responses in seconds
+        """
+        url = urlsplit(base_url)
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if url.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.host = url.netloc
+        self.path_prefix = url.path.rstrip("/")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.executor = None
+        self.local = threading.local()
+
+    def get_series(self, series_ids, start=None, end=None):
+        series_ids = [series_ids] if isinstance(series_ids, str) else list(series_ids)
+        series = self.get_series_for_ranges(
+            [(series_id, start, end) for series_id in series_ids]
+        )
+        # Series of different frequencies are aligned on the union of their dates
+        return pd.concat(
+            [series[series_id] for series_id in series_ids], axis=1, sort=True
+        ).reindex(columns=series_ids)
+
+    def get_series_for_ranges(self, ranges):
+        results = self.map(lambda args: self.fetch(*args), ranges)
+        return {series_id: series for (series_id, _, _), series in zip(ranges, results)}
+
+    def map(self, function, items):
+        """
+        Calls 'function' for each of 'items' concurrently in the worker threads, which can send requests
+        over their connections.
+
+        :returns: a list of the results in the order of 'items'
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="fred"
+            )
+        return list(self.executor.map(function, items))
+
+    def fetch(self, series_id, start=None, end=None):
+        """
+        Downloads observations of a single series in the range [start; end] over the connection of the calling
+        thread, missing observations are numpy.nan values.
+
+        :returns: a pandas.Series indexed by pandas.DatetimeIndex named 'series_id'
+        """
+        start = EARLIEST_DATE if start is None else pd.Timestamp(start).date()
+        end = date.today() if end is None else pd.Timestamp(end).date()
+        path = "%s/graph/fredgraph.csv?%s" % (
+            self.path_prefix,
+            urlencode({"id": series_id, "cosd": start, "coed": end}),
+        )
+        status, body = self.request(path)
+        if status != 200:
+            raise ValueError(
+                "Failed to retrieve %s from %s: HTTP status %d"
+                % (series_id, self.host, status)
+            )
+        observations = pd.read_csv(
+            io.BytesIO(body), index_col=0, parse_dates=True, na_values="."
+        ).iloc[:, 0]
+        return (
+            observations.astype(np.float64)
+            .rename(series_id)
+            .rename_axis("DATE")
+            .loc[pd.Timestamp(start) : pd.Timestamp(end)]
+        )
+
+    def request(self, path):
+        """
+        Sends a GET request over the connection of the calling thread, reconnecting once if the server closed it.
+
+        :returns: a tuple of the HTTP status and the body of the response
+        """
+        for attempt in range(2):
+            connection = getattr(self.local, "connection", None)
+            if connection is None:
+                connection = self.connection_class(self.host, timeout=self.timeout)
+                self.local.connection = connection
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                self.local.connection = None
+                if attempt > 0:
+                    raise
+
+    def close(self):
+        """
+        Stops the worker threads, their connections are closed when the threads exit
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+class SeriesCache(SeriesProvider):
+    """
+    Series persisted in a directory of local columnar files (Parquet or Feather, CSV is supported as well),
+    one file per series, and a catalog recording for each series the range of dates fetched, the date of its last
+    observation, when it was last fetched and its frequency. Requests are served from disk, only observations after
+    the last cached one are fetched from the source and only once a time to live depending on the frequency
+    of the series has passed since it was last fetched.
+    """
+
+    CATALOG = "catalog.json"
+
+    def __init__(self, path, provider, file_format=".parquet", ttls=DEFAULT_TTLS):
+        """
+        :param path: the directory to store series in, it is created if it doesn't exist
+        :param provider: a SeriesProvider object to fetch series from
+        :param file_format: the extension of the format series are stored in, '.parquet', '.feather' or '.csv'
+        :param ttls: a dict mapping Frequency members to datetime.timedelta objects
+        """
+        self.path = path
+        self.provider = provider
+        if file_format not in FILE_FORMATS:
+            raise ValueError("Unsupported store format: %s" % file_format)
+        self.file_format = file_format
+        self.ttls = ttls
+        os.makedirs(path, exist_ok=True)
+        catalog_path = os.path.join(path, self.CATALOG)
+        if os.path.exists(catalog_path):
+            with open(catalog_path) as f:
+                self.catalog = json.load(f)
+        else:
+            self.catalog = {}
+
+    def get_series(self, series_ids, start=None, end=None):
+        series_ids = [series_ids] if isinstance(series_ids, str) else list(series_ids)
+        start = EARLIEST_DATE if start is None else pd.Timestamp(start).date()
+        end = date.today() if end is None else pd.Timestamp(end).date()
+        self.refresh(series_ids, start, end)
+        return (
+            pd.concat(
+                [self.read(series_id) for series_id in series_ids], axis=1, sort=True
+            )
+            .reindex(columns=series_ids)
+            .loc[pd.Timestamp(start) : pd.Timestamp(end)]
+        )
+
+    def refresh(self, series_ids, start, end, now=None):
+        """
+        Fetches observations of 'series_ids' in the range [start; end] that aren't cached or are stale. Series not
+        cached since 'start' are fetched in full, the others only after their last cached observation. Series whose
+        range of fetched dates ends at the date they were fetched on are considered up to date until their time to
+        live passes.
+
+        :param series_ids: a list of series IDs
+        :param start: a datetime.date object
+        :param end: a datetime.date object
+        :param now: a timezone aware datetime.datetime object of the current time, used for testing
+        """
+        now = datetime.now(timezone.utc) if now is None else now
+        # Start dates of the ranges to fetch and whether they are full histories
+        ranges = {}
+        for series_id in dict.fromkeys(series_ids):
+            entry = self.catalog.get(series_id)
+            if entry is None or start < date.fromisoformat(entry["start"]):
+                ranges[series_id] = (start, True)
+                continue
+            last_observation = date.fromisoformat(entry["last_observation"])
+            fetched_at = datetime.fromisoformat(entry["fetched_at"])
+            fetched_until = date.fromisoformat(entry["end"])
+            # Fetching stopped before the current date at the time or the series is stale
+            if end > last_observation and (
+                (fetched_until < end and fetched_until < fetched_at.date())
+                or now - fetched_at >= self.ttls[Frequency[entry["frequency"]]]
+            ):
+                ranges[series_id] = (last_observation + timedelta(days=1), False)
+
+        # All ranges are fetched at once, concurrently if the provider supports it
+        observations = self.provider.get_series_for_ranges(
+            [
+                (series_id, range_start, end)
+                for series_id, (range_start, _) in ranges.items()
+            ]
+        )
+        for series_id, (range_start, full_history) in ranges.items():
+            self.update(
+                series_id,
+                observations[series_id].dropna(),
+                range_start if full_history else None,
+                min(end, now.date()),
+                now,
+            )
+        if ranges:
+            self.save_catalog()
+
+    def update(self, series_id, observations, start, end, fetched_at):
+        """
+        Merges observations fetched for a series into its file and its catalog entry.
+
+        :param series_id: a series ID
+        :param observations: a pandas.Series indexed by pandas.DatetimeIndex
+        :param start: the start date the observations were fetched from, None if they follow the cached ones
+        :param end: the end date the observations were fetched until
+        :param fetched_at: a timezone aware datetime.datetime object
+        """
+        fetched = observations.rename(series_id).rename_axis("DATE")
+        observations = fetched
+        entry = self.catalog.get(series_id)
+        if entry is not None:
+            cached = self.read(series_id)
+            if fetched.empty:
+                observations = cached
+            elif start is None:
+                observations = pd.concat([cached, fetched])
+            else:
+                # A longer history was fetched, cached observations after it are kept
+                observations = pd.concat(
+                    [fetched, cached.loc[pd.Timestamp(end) + pd.Timedelta(days=1) :]]
+                )
+            if start is None or start > date.fromisoformat(entry["start"]):
+                start = date.fromisoformat(entry["start"])
+            end = max(end, date.fromisoformat(entry["end"]))
+        if entry is None or not fetched.empty:
+            save_frame(observations.to_frame(), self.get_file_path(series_id))
+
+        self.catalog[series_id] = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "last_observation": (
+                observations.index[-1].date() if not observations.empty else start
+            ).isoformat(),
+            "fetched_at": fetched_at.isoformat(),
+            "frequency": Frequency.infer(observations.index).name,
+        }
+
+    def read(self, series_id):
+        """
+        Returns cached observations of 'series_id' as a pandas.Series indexed by pandas.DatetimeIndex
+        """
+        observations = read_frame(self.get_file_path(series_id))[series_id]
+        return observations.set_axis(pd.DatetimeIndex(observations.index)).rename_axis(
+            "DATE"
+        )
+
+    def save_catalog(self):
+        catalog_path = os.path.join(self.path, self.CATALOG)
+        tmp_path = "%s.%d.tmp" % (catalog_path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(self.catalog, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, catalog_path)
+
+    def get_file_path(self, series_id):
+        return os.path.join(self.path, series_id + self.file_format)
+
+
+class FredSeriesCache(SeriesCache):
+    """
+    FRED series cached locally, see SeriesCache. Series are fetched once and refreshed by requesting only
+    observations past the cached ones, so that repeated runs of scripts don't download whole histories again.
+    """
+
+    def __init__(
+        self,
+        path=DEFAULT_CACHE_PATH,
+        provider=None,
+        file_format=".parquet",
+        ttls=DEFAULT_TTLS,
+    ):
+        """
+        :param path: the directory to store series in, it is created if it doesn't exist
+        :param provider: a SeriesProvider object to fetch series from, if None series are fetched from FRED
+        :param file_format: the extension of the format series are stored in, '.parquet', '.feather' or '.csv'
+        :param ttls: a dict mapping Frequency members to datetime.timedelta objects
+        """
+        super().__init__(
+            path,
+            FredSeriesProvider() if provider is None else provider,
+            file_format,
+            ttls,
+        )
+
+
+class SeriesArchive(SeriesProvider):
+    """
+    Observations of series recorded into a directory of local columnar files, one file per series, served without
+    any access to the network so that reports run deterministically offline. Unlike SeriesCache nothing is ever
+    fetched, requesting a series that wasn't recorded is an error.
+    """
+
+    def __init__(self, path, file_format=".parquet"):
+        """
+        :param path: the directory to store series in, it is created if it doesn't exist
+        :param file_format: the extension of the format series are stored in, '.parquet', '.feather' or '.csv'
+        """
+        self.path = path
+        if file_format not in FILE_FORMATS:
+            raise ValueError("Unsupported store format: %s" % file_format)
+        self.file_format = file_format
+        # Series read from disk so far, each of them is read only once
+        self.series = {}
+        os.makedirs(path, exist_ok=True)
+
+    def get_series(self, series_ids, start=None, end=None):
+        series_ids = [series_ids] if isinstance(series_ids, str) else list(series_ids)
+        return (
+            pd.concat(
+                [self.read(series_id) for series_id in series_ids], axis=1, sort=True
+            )
+            .reindex(columns=series_ids)
+            .loc[
+                None if start is None else pd.Timestamp(start) : (
+                    None if end is None else pd.Timestamp(end)
+                )
+            ]
+        )
+
+    def record(self, observations):
+        """
+        Merges observations into the files of their series, recorded observations take precedence over the stored
+        ones for the same dates.
+
+        :param observations: a pandas.DataFrame indexed by pandas.DatetimeIndex whose columns are series IDs
+        """
+        for series_id in observations.columns:
+            recorded = observations[series_id].dropna().rename_axis("DATE")
+            if os.path.exists(self.get_file_path(series_id)):
+                recorded = pd.concat([self.read(series_id), recorded])
+                recorded = recorded[
+                    ~recorded.index.duplicated(keep="last")
+                ].sort_index()
+            save_frame(recorded.to_frame(), self.get_file_path(series_id))
+            self.series[series_id] = recorded
+
+    def read(self, series_id):
+        """
+        Returns recorded observations of 'series_id' as a pandas.Series indexed by pandas.DatetimeIndex
+        """
+        observations = self.series.get(series_id)
+        if observations is None:
+            if not os.path.exists(self.get_file_path(series_id)):
+                raise ValueError(
+                    "Series %s isn't recorded in %s" % (series_id, self.path)
+                )
+            observations = read_frame(self.get_file_path(series_id))[series_id]
+            observations = observations.set_axis(
+                pd.DatetimeIndex(observations.index)
+            ).rename_axis("DATE")
+            self.series[series_id] = observations
+        return observations
+
+    def get_file_path(self, series_id):
+        return os.path.join(self.path, series_id + self.file_format)
+
+
+class RecordingSeriesProvider(SeriesProvider):
+    """
+    Passes requests through to another provider and records every observation it returns into a SeriesArchive,
+    which can then serve the same requests offline.
+    """
+
+    def __init__(self, provider, archive):
+        """
+        :param provider: a SeriesProvider object to retrieve series from, e.g. a FredSeriesCache
+        :param archive: a SeriesArchive object to record series into
+        """
+        self.provider = provider
+        self.archive = archive
+
+    def get_series(self, series_ids, start=None, end=None):
+        observations = self.provider.get_series(series_ids, start, end)
+        self.archive.record(observations)
+        return observations
+
+    def refresh(self, series_ids, start, end):
+        self.provider.refresh(series_ids, start, end)
+
+    def get_series_for_ranges(self, ranges):
+        series = self.provider.get_series_for_ranges(ranges)
+        if series:
+            self.archive.record(pd.concat(series.values(), axis=1, sort=True))
+        return series
@@ -0,0 +1,337 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+from pricing.series_providers import FredSeriesProvider
+
+FRED_API_URL = "https://api.stlouisfed.org"
+"""
+The base URL of the FRED API, vintages of series are downloaded from its '/fred/series/observations' endpoint
+"""
+
+API_KEY_VARIABLE = "FRED_API_KEY"
+"""
+The environment variable holding the key of the FRED API used when none is passed explicitly
+"""
+
+DEFAULT_VINTAGE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "economic_analysis", "vintages"
+)
+"""
+The directory vintages of series are stored in by default
+"""
+
+COLUMNS = ("date", "realtime_start", "value")
+"""
+Columns vintages of a series consist of, each is stored in a numpy file of its own
+"""
+
+INDEX_COLUMNS = ("keys", "first_rows")
+"""
+Columns derived from vintages of a series when they are stored, the sort keys of rows and the positions of the first
+row of each observation, so that queries don't need to derive them from whole columns
+"""
+
+
+def to_day_number(dt):
+    """
+    Returns the number of days between 1970-01-01 and a datetime.date or pandas.Timestamp object
+    """
+    return np.datetime64(pd.Timestamp(dt).date(), "D").astype(np.int64)
+
+
+class VintageProvider(ABC):
+    """
+    Base class of sources of vintages of economic time series such as ALFRED. Vintages of a series are represented
+    as a pandas.DataFrame with the 'date', 'realtime_start' and 'value' columns, each row holds the value of
+    the observation on 'date' published on 'realtime_start', which stays current until a later row for the same
+    observation.
+    """
+
+    @abstractmethod
+    def get_vintages(self, series_id):
+        """
+        Returns a pandas.DataFrame of all vintages of 'series_id'
+        """
+        pass
+
+    def get_vintages_for_series(self, series_ids):
+        """
+        Returns a dict mapping each of 'series_ids' to a pandas.DataFrame of all its vintages, sources supporting
+        concurrent requests retrieve all of them at once.
+        """
+        return {series_id: self.get_vintages(series_id) for series_id in series_ids}
+
+
+class FredVintageProvider(VintageProvider):
+    """
+    Retrieves all vintages of series from the FRED API on every request, which requires an API key. Series are
+    downloaded concurrently over persistent connections in the same way as by FredSeriesProvider.
+    """
+
+    # The maximum number of rows the FRED API returns per request
+    LIMIT = 100000
+
+    def __init__(
+        self, api_key=None, base_url=FRED_API_URL, max_workers=8, timeout=30.0
+    ):
+        """
+        :param api_key: the key of the FRED API, if None it is read from the API_KEY_VARIABLE environment variable
+        :param base_url: the scheme and host of the server, optionally followed by a path prefix
+        :param max_workers: the maximum number of concurrent requests
+        :param timeout: the timeout of connecting and reading responses in seconds
+        """
+        self.api_key = os.environ.get(API_KEY_VARIABLE) if api_key is None else api_key
+        if not self.api_key:
+            raise ValueError("A FRED API key is required, see %s" % API_KEY_VARIABLE)
+        self.client = FredSeriesProvider(base_url, max_workers, timeout)
+
+    def get_vintages(self, series_id):
+        pages = []
+        count = 1
+        while len(pages) * self.LIMIT < count:
+            page, count = self.fetch(series_id, len(pages) * self.LIMIT)
+            pages.append(page)
+        vintages = pd.DataFrame(
+            [row for page in pages for row in page], columns=list(COLUMNS)
+        )
+        return vintages.assign(
+            date=pd.to_datetime(vintages.date, format="%Y-%m-%d"),
+            realtime_start=pd.to_datetime(vintages.realtime_start, format="%Y-%m-%d"),
+            # Missing values are represented by '.'
+            value=pd.to_numeric(vintages.value, errors="coerce"),
+        )
+
+    def get_vintages_for_series(self, series_ids):
+        series_ids = list(series_ids)
+        return dict(zip(series_ids, self.client.map(self.get_vintages, series_ids)))
+
+    def fetch(self, series_id, offset):
+        """
+        Downloads a page of vintages of 'series_id' starting at row 'offset'.
+
+        :returns: a tuple of a list of dicts, one per row, and the total number of rows
+        """
+        query = urlencode(
+            {
+                "series_id": series_id,
+                "realtime_start": "1776-07-04",
+                "realtime_end": "9999-12-31",
+                "file_type": "json",
+                "limit": self.LIMIT,
+                "offset": offset,
+                "api_key": self.api_key,
+            }
+        )
+        status, body = self.client.request(
+            "%s/fred/series/observations?%s" % (self.client.path_prefix, query)
+        )
+        if status != 200:
+            raise ValueError(
+                "Failed to retrieve vintages of %s from %s: HTTP status %d"
+                % (series_id, self.client.host, status)
+            )
+        response = json.loads(body)
+        return response["observations"], response["count"]
+
+    def close(self):
+        self.client.close()
+
+
+class VintageStore:
+    """
+    Vintages of series persisted in a directory of numpy files, one subdirectory per series holding a file per
+    column with rows sorted by observation date and then by the date they were published on, along with files of
+    their sort keys and the positions of the first row of each observation. Files are memory-mapped and as-of
+    queries for whole histories of dates are answered by vectorized binary searches of the sort keys rather than by
+    materializing one vintage at a time, so they read only the pages of the rows they look up. Queries spanning
+    all observations, such as first releases, read the positions of first rows in full and a row per observation.
+    """
+
+    # Observation dates and publication dates are combined into sort keys of the form
+    # date * KEY_SCALE + realtime_start + KEY_OFFSET, which covers publication dates within 11,000 years of 1970
+    KEY_SCALE = 2**23
+    KEY_OFFSET = 2**22
+
+    def __init__(self, path=DEFAULT_VINTAGE_PATH):
+        """
+        :param path: the directory to store vintages in, it is created if it doesn't exist
+        """
+        self.path = path
+        # Memory-mapped columns and sort keys of series read so far
+        self.columns = {}
+        os.makedirs(path, exist_ok=True)
+
+    def update(self, provider, series_ids):
+        """
+        Retrieves all vintages of 'series_ids' from 'provider' and replaces the stored ones.
+
+        :param provider: a VintageProvider object, e.g. a FredVintageProvider
+        :param series_ids: a list of series IDs
+        """
+        for series_id, vintages in provider.get_vintages_for_series(series_ids).items():
+            self.record(series_id, vintages)
+        return self
+
+    def record(self, series_id, vintages):
+        """
+        Replaces the stored vintages of 'series_id', the last of duplicate rows takes precedence.
+
+        :param series_id: a series ID
+        :param vintages: a pandas.DataFrame with the 'date', 'realtime_start' and 'value' columns
+        """
+        vintages = vintages.sort_values(
+            ["date", "realtime_start"], kind="stable"
+        ).drop_duplicates(["date", "realtime_start"], keep="last")
+        directory = os.path.join(self.path, series_id)
+        os.makedirs(directory, exist_ok=True)
+        dates = vintages.date.to_numpy().astype("datetime64[D]")
+        realtime_starts = vintages.realtime_start.to_numpy().astype("datetime64[D]")
+        columns = {
+            "date": dates,
+            "realtime_start": realtime_starts,
+            "value": vintages.value.to_numpy(np.float64),
+            "keys": self.get_keys(dates, realtime_starts),
+            "first_rows": np.unique(dates, return_index=True)[1],
+        }
+        for column in COLUMNS + INDEX_COLUMNS:
+            path = os.path.join(directory, column + ".npy")
+            tmp_path = "%s.%d.tmp.npy" % (path[:-4], os.getpid())
+            np.save(tmp_path, columns[column])
+            os.replace(tmp_path, path)
+        self.columns.pop(series_id, None)
+
+    def read(self, series_id):
+        """
+        Returns a tuple of memory-mapped observation dates, publication dates and values of the vintages of
+        'series_id' followed by their sort keys and the positions of the first row of each observation.
+        """
+        columns = self.columns.get(series_id)
+        if columns is None:
+            directory = os.path.join(self.path, series_id)
+            if not os.path.isdir(directory):
+                raise ValueError(
+                    "No vintages of %s are stored in %s" % (series_id, self.path)
+                )
+            columns = tuple(
+                np.load(os.path.join(directory, column + ".npy"), mmap_mode="r")
+                for column in COLUMNS + INDEX_COLUMNS
+            )
+            self.columns[series_id] = columns
+        return columns
+
+    def get_keys(self, dates, realtime_starts):
+        return (
+            np.asarray(dates, dtype="datetime64[D]").astype(np.int64) * self.KEY_SCALE
+            + np.asarray(realtime_starts, dtype="datetime64[D]").astype(np.int64)
+            + self.KEY_OFFSET
+        )
+
+    def get_values_as_of(self, series_id, observation_dates, as_of_dates):
+        """
+        Returns values of observations of 'series_id' as they were known on as-of dates, i.e. from the latest
+        vintage published on or before each as-of date.
+
+        :param series_id: a series ID
+        :param observation_dates: dates of observations, anything numpy.asarray converts to numpy.datetime64 values
+        :param as_of_dates: as-of dates broadcastable against 'observation_dates', e.g. a column of as-of dates and
+                            a row of observation dates return a matrix of values
+        :returns: a numpy.ndarray of the broadcast shape, numpy.nan for observations not published by the as-of date
+        """
+        dates, _, values, keys, _ = self.read(series_id)
+        observation_dates, as_of_dates = np.broadcast_arrays(
+            np.asarray(observation_dates, dtype="datetime64[D]"),
+            np.asarray(as_of_dates, dtype="datetime64[D]"),
+        )
+        if len(keys) == 0:
+            return np.full(observation_dates.shape, np.nan)
+        positions = (
+            np.searchsorted(
+                keys, self.get_keys(observation_dates, as_of_dates), side="right"
+            )
+            - 1
+        )
+        rows = np.maximum(positions, 0)
+        found = (positions >= 0) & (dates[rows] == observation_dates)
+        return np.where(found, values[rows], np.nan)
+
+    def get_latest_as_of(self, series_id, as_of_dates):
+        """
+        Returns the latest observation of 'series_id' published on or before each of 'as_of_dates' along with its
+        value as known on that date, i.e. the series a backtest run on each of 'as_of_dates' would have seen.
+
+        :param series_id: a series ID
+        :param as_of_dates: a pandas.DatetimeIndex or anything numpy.asarray converts to numpy.datetime64 values
+        :returns: a pandas.DataFrame indexed by 'as_of_dates' with the 'Observation date' and 'Value' columns,
+                  NaT and numpy.nan for as-of dates preceding the first publication
+        """
+        dates, realtime_starts, _, _, first_rows = self.read(series_id)
+        as_of = np.asarray(as_of_dates, dtype="datetime64[D]")
+        unique_dates = dates[first_rows]
+        first_releases = realtime_starts[first_rows]
+        order = np.argsort(first_releases, kind="stable")
+        # Observations are usually published in order, the running maximum accounts for ones published late
+        latest_dates = np.maximum.accumulate(unique_dates[order])
+        positions = np.searchsorted(first_releases[order], as_of, side="right") - 1
+        published = positions >= 0
+        observation_dates = np.full(as_of.shape, np.datetime64("NaT"), "datetime64[D]")
+        observation_dates[published] = latest_dates[positions[published]]
+        values = np.full(as_of.shape, np.nan)
+        values[published] = self.get_values_as_of(
+            series_id, observation_dates[published], as_of[published]
+        )
+        return pd.DataFrame(
+            {
+                "Observation date": pd.DatetimeIndex(observation_dates),
+                "Value": values,
+            },
+            index=pd.DatetimeIndex(as_of),
+        )
+
+    def get_first_releases(self, series_id):
+        """
+        Returns the values of observations of 'series_id' as first published, free of any later revisions.
+
+        :returns: a pandas.Series indexed by pandas.DatetimeIndex of observation dates named 'series_id'
+        """
+        dates, _, values, _, first_rows = self.read(series_id)
+        return pd.Series(
+            values[first_rows],
+            index=pd.DatetimeIndex(dates[first_rows], name="DATE"),
+            name=series_id,
+        )
+
+    def get_series_as_of(self, series_ids, as_of, start=None, end=None):
+        """
+        Returns observations of 'series_ids' in the range [start; end] as they were known on a single as-of date,
+        in the same layout as SeriesProvider.get_series.
+
+        :param series_ids: a series ID or a list of series IDs
+        :param as_of: a datetime.date object
+        :param start: a datetime.date object or None to return full histories
+        :param end: a datetime.date object or None to return all observations published by 'as_of'
+        """
+        series_ids = [series_ids] if isinstance(series_ids, str) else list(series_ids)
+        series = []
+        for series_id in series_ids:
+            dates, _, _, keys, first_rows = self.read(series_id)
+            # Rows of observations in the range [start; end], i.e. whose keys are in the range
+            # [start * KEY_SCALE; (end + 1) * KEY_SCALE)
+            first_day = -(2**40) if start is None else to_day_number(start)
+            last_day = 2**40 if end is None else to_day_number(end)
+            row_range = np.searchsorted(
+                keys, [first_day * self.KEY_SCALE, (last_day + 1) * self.KEY_SCALE]
+            )
+            dates = dates[first_rows[slice(*np.searchsorted(first_rows, row_range))]]
+            series.append(
+                pd.Series(
+                    self.get_values_as_of(series_id, dates, as_of),
+                    index=pd.DatetimeIndex(dates, name="DATE"),
+                    name=series_id,
+                ).dropna()
+            )
+        return pd.concat(series, axis=1, sort=True).reindex(columns=series_ids)
@@ -0,0 +1,77 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from pricing.bonds import BondPortfolio, get_discount_factors_for_times
+from pricing.curves import YieldCurve
+
+
+@pytest.fixture
+def portfolio():
+    return BondPortfolio.from_fixed_coupon_bonds(
+        np.array([0.0, 0.02, 0.045, 0.06, 0.0375]),
+        np.array([0.5, 2.0, 7.25, 10.0, 29.75]),
+        coupon_frequencies=np.array([2, 2, 2, 1, 2]),
+    )
+
+
+@pytest.fixture
+def curve():
+    return YieldCurve(
+        date(2024, 2, 29),
+        [relativedelta(months=months) for months in (1, 3, 6, 12, 24, 60, 120, 360)],
+        np.array([5.3, 5.45, 5.3, 5.0, 4.6, 4.2, 4.25, 4.4]) / 100,
+    )
+
+
+def get_present_values(portfolio, rate):
+    return portfolio.sum_by_bond(portfolio.amounts * np.exp(-rate * portfolio.times))
+
+
+@pytest.mark.parametrize("discount_rates", ["flat", "curve"])
+def test_key_rate_dv01s_sum_up_to_dv01(portfolio, curve, discount_rates):
+    discount_rates = 0.05 if discount_rates == "flat" else curve
+
+    key_rate_dv01s = portfolio.get_key_rate_dv01s(discount_rates)
+
+    np.testing.assert_allclose(
+        key_rate_dv01s.sum(axis=1),
+        portfolio.get_risk_measures(discount_rates)["DV01"],
+    )
+
+
+def test_risk_measures_match_finite_differences(portfolio):
+    rate, h = 0.05, 1e-5
+    pvs = get_present_values(portfolio, rate)
+    up = get_present_values(portfolio, rate + h)
+    down = get_present_values(portfolio, rate - h)
+
+    risk_measures = portfolio.get_risk_measures(rate)
+
+    np.testing.assert_allclose(risk_measures["Present value"], pvs)
+    np.testing.assert_allclose(
+        risk_measures["Modified duration"], (down - up) / (2 * h) / pvs, rtol=1e-7
+    )
+    np.testing.assert_allclose(
+        risk_measures["Convexity"], (up - 2 * pvs + down) / h**2 / pvs, rtol=1e-4
+    )
+    np.testing.assert_allclose(
+        risk_measures["DV01"], (down - up) / (2 * h) * 1e-4, rtol=1e-7
+    )
+
+
+def test_z_spreads_reprice_bonds(portfolio, curve):
+    spreads = np.array([0.001, -0.002, 0.0, 0.015, 0.0075])
+    discount_factors = get_discount_factors_for_times(curve, portfolio.unique_times)
+    prices = portfolio.sum_by_bond(
+        portfolio.amounts
+        * discount_factors[portfolio.time_indices]
+        * np.exp(-np.repeat(spreads, np.diff(portfolio.offsets)) * portfolio.times)
+    )
+
+    z_spreads = portfolio.get_z_spreads(curve, prices)
+
+    np.testing.assert_allclose(z_spreads["Z-spread"], spreads, atol=1e-10)
+    np.testing.assert_allclose(z_spreads["Residual"], 0.0, atol=1e-9)
@@ -0,0 +1,91 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from pricing.bonds import BondPortfolio
+from pricing.calendars import FOMC_MEETING_DATES
+from pricing.curves import YieldCurve
+from pricing.futures_rates import (
+    CashflowDescriptor,
+    CMEFedFundsFuturesRates,
+    CMEFixedIncomeFuturesRates,
+)
+from pricing.price_providers import FixturePriceProvider
+
+
+def get_price_provider(price=96.0):
+    months = np.arange(np.datetime64("2025-01"), np.datetime64("2028-07"))
+    tickers = [
+        ticker
+        for ticker, _ in CMEFedFundsFuturesRates.get_tickers(months, "ZQ", ".CBT")
+    ]
+    days = pd.bdate_range("2025-01-01", "2028-06-30")
+    return FixturePriceProvider(pd.DataFrame(price, index=days, columns=tickers))
+
+
+def test_meeting_rates_history_with_different_numbers_of_meetings():
+    # The horizon of the first valuation date has no meetings left, the one of the second has two
+    meeting_dates = FOMC_MEETING_DATES[FOMC_MEETING_DATES < np.datetime64("2026-07-01")]
+    valuation_dates = np.array(["2026-06-01", "2026-03-02"], dtype="datetime64[D]")
+    price_provider = get_price_provider()
+
+    history = CMEFedFundsFuturesRates.get_meeting_rates_history(
+        valuation_dates, 3, price_provider, meeting_dates
+    )
+
+    assert (history["Valuation date"] == valuation_dates[1]).all()
+    for valuation_date in valuation_dates:
+        expected = CMEFedFundsFuturesRates.get_meeting_rates_history(
+            valuation_dates[valuation_dates == valuation_date],
+            3,
+            price_provider,
+            meeting_dates,
+        )
+        actual = history[history["Valuation date"] == valuation_date]
+        np.testing.assert_allclose(
+            actual.iloc[:, 2:].to_numpy(), expected.iloc[:, 2:].to_numpy()
+        )
+    np.testing.assert_allclose(history["Post-meeting rate"], 0.04)
+
+
+@pytest.mark.parametrize(
+    "valuation_date, meetings",
+    [
+        ("2014-11-03", ["2015-01-28", "2015-03-18", "2015-04-29"]),
+        ("2027-10-01", ["2027-12-08"]),
+    ],
+)
+def test_meeting_rates_history_outside_of_meeting_dates(valuation_date, meetings):
+    # No meetings are assumed outside of the years covered by FOMC_MEETING_DATES
+    with pytest.warns(UserWarning, match="FOMC meeting dates are known"):
+        history = CMEFedFundsFuturesRates.get_meeting_rates_history(
+            np.array([valuation_date], dtype="datetime64[D]"), 6, get_price_provider()
+        )
+
+    np.testing.assert_array_equal(
+        history["Meeting date"], np.array(meetings, dtype="datetime64[ns]")
+    )
+
+
+def test_cashflow_descriptor_with_curve_starting_after_time_zero():
+    curve = YieldCurve(
+        date(2024, 2, 29),
+        [relativedelta(months=months) for months in (1, 3, 6, 12, 24, 60, 120)],
+        np.array([5.3, 5.3, 5.2, 5.0, 4.6, 4.2, 4.2]) / 100,
+    )
+    descriptor = CashflowDescriptor(0.05, 2, 100, 5)
+    portfolio = BondPortfolio.from_fixed_coupon_bonds(np.array([0.05]), np.array([5.0]))
+
+    np.testing.assert_allclose(
+        descriptor.pv_all_cashflows(curve), portfolio.get_present_values(curve)[0]
+    )
+
+
+def test_tnote_prices_to_yields_of_no_prices():
+    yields, converged = CMEFixedIncomeFuturesRates.tnote_prices_to_yields(np.empty(0))
+
+    assert yields.shape == converged.shape == (0,)
+    assert converged.dtype == bool
@@ -0,0 +1,131 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pricing.replay import ReplayServer
+from pricing.series_providers import (
+    FredSeriesProvider,
+    SeriesArchive,
+    SeriesCache,
+    SeriesProvider,
+)
+
+START = date(2024, 1, 1)
+END = date(2024, 6, 28)
+FETCHED_AT = datetime(2024, 3, 29, 18, tzinfo=timezone.utc)
+
+
+class LoggingSeriesProvider(SeriesProvider):
+    """
+    Passes requests through to another provider and logs the ranges requested from it
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.ranges = []
+
+    def get_series(self, series_ids, start=None, end=None):
+        return self.provider.get_series(series_ids, start, end)
+
+    def get_series_for_ranges(self, ranges):
+        self.ranges.extend(ranges)
+        return self.provider.get_series_for_ranges(ranges)
+
+
+def get_observations(end=END):
+    days = pd.bdate_range(START, end)
+    return pd.DataFrame(
+        {"DGS10": 4.0 + 0.01 * np.arange(len(days))},
+        index=days.rename("DATE"),
+    )
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = SeriesArchive(str(tmp_path / "archive"), ".csv")
+    archive.record(get_observations(FETCHED_AT.date()))
+    return archive
+
+
+@pytest.fixture
+def provider(archive):
+    with ReplayServer(archive) as server:
+        provider = FredSeriesProvider(server.url)
+        yield provider
+        provider.close()
+
+
+@pytest.fixture
+def cache(tmp_path, provider):
+    return SeriesCache(str(tmp_path / "cache"), LoggingSeriesProvider(provider), ".csv")
+
+
+def test_fred_series_provider(archive, provider):
+    observations = provider.get_series(["DGS10"], date(2024, 2, 1), date(2024, 2, 29))
+
+    pd.testing.assert_frame_equal(
+        observations,
+        archive.get_series(["DGS10"], date(2024, 2, 1), date(2024, 2, 29)),
+        check_freq=False,
+    )
+
+
+def test_fred_series_provider_missing_series(provider):
+    with pytest.raises(ValueError, match="HTTP status 404"):
+        provider.get_series(["MISSING"], START, END)
+
+
+def test_series_cache_cold_fetch(archive, cache):
+    cache.refresh(["DGS10"], START, END, FETCHED_AT)
+
+    assert cache.provider.ranges == [("DGS10", START, END)]
+    pd.testing.assert_series_equal(
+        cache.read("DGS10"), archive.read("DGS10"), check_freq=False
+    )
+    assert cache.catalog["DGS10"] == {
+        "start": "2024-01-01",
+        "end": "2024-03-29",
+        "last_observation": "2024-03-29",
+        "fetched_at": FETCHED_AT.isoformat(),
+        "frequency": "DAILY",
+    }
+
+
+def test_series_cache_tail_refresh(archive, cache):
+    cache.refresh(["DGS10"], START, END, FETCHED_AT)
+    archive.record(get_observations())
+    cache.refresh(["DGS10"], START, END, FETCHED_AT + timedelta(days=1))
+
+    assert cache.provider.ranges[1:] == [("DGS10", date(2024, 3, 30), END)]
+    pd.testing.assert_series_equal(
+        cache.read("DGS10"), archive.read("DGS10"), check_freq=False
+    )
+    assert cache.catalog["DGS10"]["last_observation"] == "2024-06-28"
+
+
+def test_series_cache_ttl_expiry(archive, cache):
+    cache.refresh(["DGS10"], START, END, FETCHED_AT)
+    archive.record(get_observations())
+
+    # Daily series stay up to date for 12 hours after being fetched
+    cache.refresh(["DGS10"], START, END, FETCHED_AT + timedelta(hours=11))
+    assert len(cache.provider.ranges) == 1
+    cache.refresh(["DGS10"], START, END, FETCHED_AT + timedelta(hours=12))
+    assert cache.provider.ranges[1:] == [("DGS10", date(2024, 3, 30), END)]
+
+
+def test_series_cache_earlier_start(archive, cache):
+    cache.refresh(["DGS10"], date(2024, 3, 1), END, FETCHED_AT)
+    cache.refresh(["DGS10"], START, END, FETCHED_AT + timedelta(hours=1))
+
+    # The full history is fetched again although the cached one is up to date
+    assert cache.provider.ranges == [
+        ("DGS10", date(2024, 3, 1), END),
+        ("DGS10", START, END),
+    ]
+    pd.testing.assert_series_equal(
+        cache.read("DGS10"), archive.read("DGS10"), check_freq=False
+    )
+    assert cache.catalog["DGS10"]["start"] == "2024-01-01"
@@ -6,7 +6,6 @@ import scipy
 import matplotlib.ticker as mtick
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-import pandas_datareader.data as web
 
 import warnings
 warnings.filterwarnings('ignore', message='optional dependency requests_cache*', category=RuntimeWarning)
@@ -14,6 +13,10 @@ import pandasdmx as sdmx
 
 from datetime import date
 
+from pricing.replay import get_series_provider
+
+fred = get_series_provider()
+
 # %%
 
 report_start
@@ -52,4 +55,4 @@ oecd_json_override = '{"id": "OECD", "data_content_type": "JSON",\
     "name": "Organisation for Economic Co-operation and Development"}'
 sdmx.add_source(oecd_json_override, id='OECD', override=True)
 
-data = web.get_data_fred(['CNP16OV', 'CLF16OV'])
\ No newline at end of file
+data = fred.get_series(['CNP16OV', 'CLF16OV'])
\ No newline at end of file